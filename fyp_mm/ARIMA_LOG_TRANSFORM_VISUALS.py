@@ -0,0 +1,151 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+import os
+from . import run_metrics
+from .ARIMApredictions import detect_anomalies
+from .partitioned_results import write_partitioned
+from .walk_forward_checkpoint import series_fingerprint
+
+warnings.filterwarnings("ignore")
+
+def process_file(file_name, sample_fraction, max_train=None, checkpoint=False, prefilter_threshold=None):
+  
+    print(f"\n=== Processing file: {file_name} ({sample_fraction}% sample) ===")
+    with run_metrics.stage("load", file=file_name) as load_stats:
+        df = pd.read_parquet(file_name)
+        load_stats["rows"] = len(df)
+    with run_metrics.stage("build_datetime"):
+        df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+        df = df.sort_values("datetime").set_index("datetime")
+    
+    ts_raw = df["SUM_SESSIONS"].copy()
+    ts_raw = pd.to_numeric(ts_raw, errors='coerce').dropna()
+    
+    ts_log = np.log1p(ts_raw)
+    ts_log.name = "LOG_SUM_SESSIONS"
+    
+    base_name = os.path.splitext(file_name)[0]
+    checkpoint_file = f"{base_name}_SUM_SESSIONS_checkpoint.jsonl" if checkpoint else None
+    with run_metrics.stage("detect_anomalies", points=len(ts_log)) as detect_stats:
+        # Same walk-forward as SUM_MB with a wider interval (alpha 0.0001)
+        anomalies, forecast_results, runtime = detect_anomalies(ts_log, max_train=max_train,
+                                                                prefilter_threshold=prefilter_threshold,
+                                                                checkpoint_file=checkpoint_file,
+                                                                alpha=0.0001, metric="SUM_SESSIONS")
+        detect_stats["anomalies"] = len(anomalies)
+    print(f"File {file_name}: Detected {len(anomalies)} anomalies in {runtime:.2f} sec.")
+    
+    # List each detected anomaly with its entry number
+    if anomalies:
+        print("\nAnomaly details:")
+        for anomaly in anomalies:
+            print(f"Entry: {anomaly['entry']}, Datetime: {anomaly['datetime']}, Actual: {anomaly['actual']:.2f}, "
+                  f"Forecast: {anomaly['forecast']:.2f}, Lower Bound: {anomaly['lower_bound']:.2f}, "
+                  f"Upper Bound: {anomaly['upper_bound']:.2f}")
+    
+    # Save forecast results as a day-partitioned dataset; only days not
+    # written by an earlier run (plus the last, possibly partial, day) are written
+    forecast_root = f"{base_name}_forecast_results_SUM_SESSIONS"
+    with run_metrics.stage("write_parquet") as write_stats:
+        # A changed input (e.g. late rows folded into old hours) rewrites every day
+        fingerprint = series_fingerprint(ts_log, max_train=max_train, prefilter_threshold=prefilter_threshold)
+        written = write_partitioned(forecast_results, forecast_root, fingerprint=fingerprint)
+        write_stats["partitions"] = len(written)
+        print(f"Saved {len(written)} day partitions of forecast results to {forecast_root}/")
+    
+        # Save anomalies the same way if any anomalies exist, or if an earlier
+        # run left days that a changed input may have made stale
+        anomalies_root = f"{base_name}_anomalies_SUM_SESSIONS"
+        if anomalies or os.path.isdir(anomalies_root):
+            anomalies_df = pd.DataFrame(anomalies)
+            written = write_partitioned(anomalies_df, anomalies_root, fingerprint=fingerprint)
+            print(f"Saved {len(written)} day partitions of anomalies to {anomalies_root}/")
+    
+    with run_metrics.stage("plot"):
+        import matplotlib.pyplot as plt
+
+        # Plot the results on the original scale
+        plt.figure(figsize=(12, 5))
+        plt.plot(ts_raw.index, ts_raw, label="Actual SUM_SESSIONS", color="blue", alpha=0.6)
+        if not forecast_results.empty:
+            forecast_results['datetime'] = pd.to_datetime(forecast_results['datetime'])
+            plt.fill_between(forecast_results['datetime'],
+                             forecast_results['lower'],
+                             forecast_results['upper'],
+                             color="gray", alpha=0.3, label="99.73% Forecast CI")
+            plt.plot(forecast_results['datetime'], forecast_results['forecast'], color="orange", linestyle="--", label="Forecast Mean")
+        if anomalies:
+            anomaly_times = [a["datetime"] for a in anomalies]
+            anomaly_values = [a["actual"] for a in anomalies]
+            plt.scatter(anomaly_times, anomaly_values, color="red", label="Anomalies", zorder=5)
+        plt.xlabel("Datetime", fontsize=20)         # _Changed fontsize to 20_
+        plt.ylabel("SUM_SESSIONS", fontsize=20)             # _Changed fontsize to 20_
+        plt.title(f"ARIMA(1,0,0)(1,0,2)[24] Anomaly Detection ({sample_fraction}% Sample) - Original Scale", fontsize=22)  # _Changed fontsize to 22_
+        plt.xticks(fontsize=16)                       # _Changed tick label fontsize to 16_
+        plt.yticks(fontsize=16)                       # _Changed tick label fontsize to 16_
+        plt.legend(fontsize=18)                       # _Changed legend fontsize to 18_
+        plt.tight_layout()
+        plt.show()
+    
+        # Plot the results on the log-transformed scale
+        plt.figure(figsize=(12, 5))
+        plt.plot(ts_log.index, ts_log, label="Actual log(SUM_SESSIONS)", color="blue", alpha=0.6)
+        if not forecast_results.empty:
+            plt.fill_between(forecast_results['datetime'],
+                             forecast_results['lower_log'],
+                             forecast_results['upper_log'],
+                             color="gray", alpha=0.3, label="99.73% Forecast CI (log scale)")
+            plt.plot(forecast_results['datetime'], forecast_results['forecast_log'], color="orange", linestyle="--", label="Forecast Mean (log scale)")
+        if anomalies:
+            # Convert anomaly actual values to log-scale
+            anomaly_times = [a["datetime"] for a in anomalies]
+            anomaly_log_values = [np.log1p(a["actual"]) for a in anomalies]
+            plt.scatter(anomaly_times, anomaly_log_values, color="red", label="Anomalies (log scale)", zorder=5)
+        plt.xlabel("Datetime", fontsize=20)         # _Changed fontsize to 20_
+        plt.ylabel("log(SUM_SESSIONS)", fontsize=20)         # _Changed fontsize to 20_
+        plt.title(f"ARIMA(1,0,0)(1,0,2)[24] Anomaly Detection ({sample_fraction}% Sample) - Log Scale", fontsize=22)  # _Changed fontsize to 22_
+        plt.xticks(fontsize=16)                       # _Changed tick label fontsize to 16_
+        plt.yticks(fontsize=16)                       # _Changed tick label fontsize to 16_
+        plt.legend(fontsize=18)                       # _Changed legend fontsize to 18_
+        plt.tight_layout()
+        plt.show()
+
+    
+    return len(anomalies), runtime
+
+def main(checkpoint=False, prefilter_threshold=None, max_train=None):
+    overall_start = time.time()
+    
+    # Define file names for each sample fraction, including full aggregated data (100%)
+    sample_files = [
+        ("numeric_columns_hourly.parquet", 100)
+        #("numeric_columns_hourly_15.parquet", 15),
+        #("numeric_columns_hourly_30.parquet", 30),
+        #("numeric_columns_hourly_50.parquet", 50),
+        #("numeric_columns_hourly_80.parquet", 80),
+        #("numeric_columns_hourly_5.parquet", 5),
+        #("numeric_columns_hourly_1.parquet", 1)
+    ]
+    
+    run = run_metrics.start_run("arima_sum_sessions")
+    summary = []
+    for file_name, perc in sample_files:
+        with run_metrics.stage("process_file", file=file_name, sample_fraction=perc):
+            anomaly_count, runtime = process_file(file_name, perc, max_train=max_train, checkpoint=checkpoint,
+                                                  prefilter_threshold=prefilter_threshold)
+        summary.append((perc, anomaly_count, runtime))
+    
+    overall_end = time.time()
+    total_overall = overall_end - overall_start
+    
+    print("\n=== Summary of Anomaly Detection Results ===")
+    for perc, count, rt in summary:
+        print(f"{perc}% sample: {count} anomalies detected, runtime: {rt:.2f} sec")
+    print(f"Total execution time (including plotting for all samples): {total_overall:.2f} sec")
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
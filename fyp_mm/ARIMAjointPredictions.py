@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+import os
+from . import run_metrics
+
+warnings.filterwarnings("ignore")
+
+METRICS = ["SUM_MB", "SUM_SESSIONS"]
+# Per-metric interval alphas of ARIMApredictions.py and ARIMA_LOG_TRANSFORM_VISUALS.py,
+# so the per-metric flags here match the single-metric runs
+ALPHAS = {"SUM_MB": 0.0027, "SUM_SESSIONS": 0.0001}
+# The joint Mahalanobis test keeps the ~3 sigma level
+JOINT_ALPHA = 0.0027
+
+def fourier_terms(index, period=24, harmonics=3):
+    # Daily seasonality as sin/cos pairs of the hour of day, known for any future hour
+    hours = np.asarray(index.hour, dtype=float)
+    terms = {}
+    for k in range(1, harmonics + 1):
+        terms[f"sin_{k}"] = np.sin(2 * np.pi * k * hours / period)
+        terms[f"cos_{k}"] = np.cos(2 * np.pi * k * hours / period)
+    return pd.DataFrame(terms, index=index)
+
+def detect_joint_anomalies(ts_log_df, initial_train=120, forecast_horizon=48, alphas=None, joint_alpha=JOINT_ALPHA,
+                           max_train=None, harmonics=3, verbose=True):
+    """
+    Walk-forward detection on SUM_MB and SUM_SESSIONS together.
+
+    Each window fits one VARMAX(1,0) on both log series, with Fourier terms of
+    the hour of day as exogenous regressors for the daily cycle. From the one
+    forecast we get per-metric intervals at each metric's alpha in `alphas`
+    (default ALPHAS) and a joint Mahalanobis distance of the forecast errors,
+    which is flagged against the chi-squared quantile at `joint_alpha`.
+    """
+    from scipy.stats import norm, chi2
+    from statsmodels.tsa.statespace.varmax import VARMAX
+
+    start = time.time()
+    n = len(ts_log_df)
+    metrics = list(ts_log_df.columns)
+    alphas = ALPHAS if alphas is None else alphas
+    z_critical = norm.ppf(1 - np.array([alphas[m] for m in metrics]) / 2)  # one per metric
+    d2_critical = chi2.ppf(1 - joint_alpha, df=len(metrics))
+    exog = fourier_terms(ts_log_df.index, harmonics=harmonics).to_numpy()
+    training_end = initial_train
+    window_frames = []
+    run = run_metrics.current_run()
+
+    while training_end + forecast_horizon <= n:
+        train_start = 0 if max_train is None else max(0, training_end - max_train)
+        train_data = ts_log_df.iloc[train_start:training_end]
+        test_data = ts_log_df.iloc[training_end: training_end + forecast_horizon]
+        if verbose:
+            print(f"{'Expanding' if max_train is None else 'Sliding'} window: Training size = {len(train_data)}, Test size = {len(test_data)}")
+        run.increment("windows")
+
+        try:
+            with run.stage("fit", window_start=test_data.index[0], train_size=len(train_data)) as fit_stats:
+                model = VARMAX(train_data.to_numpy(), order=(1, 0), trend="c", exog=exog[train_start:training_end])
+                model_fit = model.fit(disp=False)
+                retvals = getattr(model_fit, "mle_retvals", None) or {}
+                fit_stats["iterations"] = retvals.get("iterations")
+                fit_stats["converged"] = retvals.get("converged")
+            if fit_stats["converged"] is False:
+                run.increment("convergence_failures")
+        except Exception as e:
+            print(f"Error fitting VARMAX model with training size {len(train_data)}: {e}")
+            run.increment("fit_errors")
+            break
+
+        try:
+            with run.stage("forecast", window_start=test_data.index[0]):
+                forecast_obj = model_fit.get_forecast(steps=forecast_horizon,
+                                                      exog=exog[training_end: training_end + forecast_horizon])
+                forecast_mean = np.asarray(forecast_obj.predicted_mean)  # (horizon, metrics)
+                # Full error covariance per step, (metrics, metrics, horizon) -> (horizon, metrics, metrics)
+                forecast_cov = np.asarray(forecast_obj.prediction_results.forecasts_error_cov).transpose(2, 0, 1)
+        except Exception as e:
+            print(f"Error during forecasting with training size {len(train_data)}: {e}")
+            run.increment("forecast_errors")
+            training_end += forecast_horizon
+            continue
+
+        with run.stage("flag", window_start=test_data.index[0]):
+            actual_log = test_data.to_numpy()
+            residual = actual_log - forecast_mean
+            se = np.sqrt(np.diagonal(forecast_cov, axis1=1, axis2=2))
+            z = residual / se
+            d2 = np.einsum("hi,hi->h", residual, np.linalg.solve(forecast_cov, residual[..., None])[..., 0])
+
+            frame = pd.DataFrame({
+                "entry": np.arange(training_end, training_end + forecast_horizon) + 1,
+                "datetime": test_data.index,
+            })
+            for j, metric in enumerate(metrics):
+                frame[f"actual_{metric}"] = np.expm1(actual_log[:, j])
+                frame[f"forecast_{metric}"] = np.expm1(forecast_mean[:, j])
+                frame[f"lower_{metric}"] = np.expm1(forecast_mean[:, j] - z_critical[j] * se[:, j])
+                frame[f"upper_{metric}"] = np.expm1(forecast_mean[:, j] + z_critical[j] * se[:, j])
+                frame[f"z_{metric}"] = z[:, j]
+                frame[f"anomaly_{metric}"] = np.abs(z[:, j]) > z_critical[j]
+            frame["mahalanobis_d2"] = d2
+            frame["anomaly_joint"] = d2 > d2_critical
+            # What MB_SESSIONS_OVERLAP.py used to compute from two separate runs
+            frame["anomaly_all_metrics"] = frame[[f"anomaly_{m}" for m in metrics]].all(axis=1)
+            window_frames.append(frame)
+
+        training_end += forecast_horizon
+
+    results = pd.concat(window_frames, ignore_index=True) if window_frames else pd.DataFrame()
+    runtime = time.time() - start
+    return results, runtime
+
+def process_file(file_name, sample_fraction, max_train=None, joint_alpha=JOINT_ALPHA):
+
+    print(f"\n=== Joint processing of {', '.join(METRICS)}: {file_name} ({sample_fraction}% sample) ===")
+    with run_metrics.stage("load", file=file_name) as load_stats:
+        df = pd.read_parquet(file_name, columns=["USAGE_DATE", "SESSION_HOUR"] + METRICS)
+        load_stats["rows"] = len(df)
+    with run_metrics.stage("build_datetime"):
+        df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+        df = df.sort_values("datetime").set_index("datetime")
+
+    ts_raw = df[METRICS].apply(pd.to_numeric, errors='coerce').dropna()
+    ts_log = np.log1p(ts_raw)
+
+    with run_metrics.stage("detect_anomalies", points=len(ts_log)) as detect_stats:
+        results, runtime = detect_joint_anomalies(ts_log, joint_alpha=joint_alpha, max_train=max_train)
+        detect_stats["anomalies"] = int(results["anomaly_joint"].sum()) if not results.empty else 0
+
+    if results.empty:
+        print(f"File {file_name}: no windows could be fitted.")
+        return {}, runtime
+
+    counts = {
+        "SUM_MB": int(results["anomaly_SUM_MB"].sum()),
+        "SUM_SESSIONS": int(results["anomaly_SUM_SESSIONS"].sum()),
+        "both": int(results["anomaly_all_metrics"].sum()),
+        "joint": int(results["anomaly_joint"].sum()),
+    }
+    print(f"File {file_name}: {counts['SUM_MB']} SUM_MB anomalies, {counts['SUM_SESSIONS']} SUM_SESSIONS anomalies, "
+          f"{counts['both']} flagged on both, {counts['joint']} joint (Mahalanobis) anomalies in {runtime:.2f} sec.")
+
+    base_name = os.path.splitext(file_name)[0]
+    with run_metrics.stage("write_parquet"):
+        forecast_file = f"{base_name}_joint_forecast_results.parquet"
+        results.to_parquet(forecast_file)
+        print(f"Saved joint forecast results to {forecast_file}")
+        flagged = results[results[["anomaly_SUM_MB", "anomaly_SUM_SESSIONS", "anomaly_joint"]].any(axis=1)]
+        if not flagged.empty:
+            anomalies_file = f"{base_name}_anomalies_joint.parquet"
+            flagged.to_parquet(anomalies_file)
+            print(f"Saved anomalies to {anomalies_file}")
+
+    with run_metrics.stage("plot"):
+        import matplotlib.pyplot as plt
+        from scipy.stats import chi2
+
+        d2_critical = chi2.ppf(1 - joint_alpha, df=len(METRICS))
+        plt.figure(figsize=(14, 7))
+        plt.plot(results["datetime"], results["mahalanobis_d2"], label="Joint Mahalanobis distance", color="blue", alpha=0.6)
+        plt.axhline(d2_critical, color="gray", linestyle="--", label=f"{1 - joint_alpha:.2%} chi-squared threshold")
+        joint = results[results["anomaly_joint"]]
+        plt.scatter(joint["datetime"], joint["mahalanobis_d2"], color="red", label="Joint anomalies", zorder=5)
+        plt.yscale("log")
+        plt.xlabel("Datetime", fontsize=22)
+        plt.ylabel("Mahalanobis distance (squared)", fontsize=22)
+        plt.title(f"Joint VARMAX Anomaly Score for SUM_MB and SUM_SESSIONS ({sample_fraction}% Sample)", fontsize=26)
+        plt.xticks(fontsize=20)
+        plt.yticks(fontsize=20)
+        plt.legend(fontsize=20)
+        plt.tight_layout()
+        plt.show()
+
+    return counts, runtime
+
+def main(max_train=None):
+    overall_start = time.time()
+
+    sample_files = [
+        ("numeric_columns_hourly_1.parquet", 1),
+        ("numeric_columns_hourly.parquet", 100)
+    ]
+
+    run = run_metrics.start_run("arima_joint")
+    summary = []
+    for file_name, perc in sample_files:
+        with run_metrics.stage("process_file", file=file_name, sample_fraction=perc):
+            counts, runtime = process_file(file_name, perc, max_train=max_train)
+        summary.append((perc, counts, runtime))
+
+    print("\n=== Summary of Joint Anomaly Detection Results ===")
+    for perc, counts, rt in summary:
+        print(f"{perc}% sample: {counts}, runtime: {rt:.2f} sec")
+    print(f"Total execution time (including plotting for all samples): {time.time() - overall_start:.2f} sec")
+    run.finish()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+import os
+from . import run_metrics
+from .partitioned_results import write_partitioned
+from .seasonal_prefilter import candidate_windows
+from .walk_forward_checkpoint import WalkForwardCheckpoint, series_fingerprint
+
+warnings.filterwarnings("ignore")
+
+def detect_anomalies(ts_log, initial_train=120, forecast_horizon=48, verbose=True, prefilter_threshold=None,
+                     max_train=None, warm_start=None, params_out=None, checkpoint_file=None, checkpoint_every=5,
+                     alpha=0.0027, metric="SUM_MB"):
+    # Walk-forward ARIMA(1,0,0)(1,0,2)[24] on a log1p series, flagging actuals
+    # outside the (1 - alpha) forecast interval. Shared by the SUM_MB (alpha
+    # 0.0027, ~3 sigma) and SUM_SESSIONS (alpha 0.0001) scripts; metric only
+    # labels the checkpoint so the two never resume each other's windows.
+    # With prefilter_threshold set, windows whose seasonal robust z-scores stay
+    # below the threshold are skipped without fitting (see seasonal_prefilter.py).
+    # With max_train set, each fit uses only the last max_train points (sliding
+    # window) instead of all history (expanding window).
+    # warm_start maps a window's first forecast timestamp to fitted parameters
+    # (e.g. from a larger sample fraction) used as start_params; params_out, if
+    # given, is filled with this run's fitted parameters in the same form.
+    # With checkpoint_file set, finished windows are appended to that file every
+    # checkpoint_every windows and a rerun on the same input resumes after the
+    # last one written (see walk_forward_checkpoint.py). The file is removed once
+    # every window is done, and the returned runtime excludes restored windows.
+  
+    from statsmodels.tsa.arima.model import ARIMA
+
+    n = len(ts_log)
+    training_end = initial_train
+    anomalies = []
+    # The log-scale columns are kept for the log-scale plots, and forecast_log
+    # and se_log so other thresholds can be applied later without refitting
+    # (see interval_thresholds.py)
+    forecast_results = pd.DataFrame(columns=["datetime", "forecast", "lower", "upper", "actual",
+                                             "forecast_log", "lower_log", "upper_log", "actual_log", "se_log"])
+    
+    entry_mapping = {dt: idx + 1 for idx, dt in enumerate(ts_log.index)}
+    run = run_metrics.current_run()
+    
+    checkpoint = None
+    interrupted = False
+    if checkpoint_file is not None:
+        fingerprint = series_fingerprint(ts_log, initial_train=initial_train, forecast_horizon=forecast_horizon,
+                                         prefilter_threshold=prefilter_threshold, max_train=max_train,
+                                         order=(1, 0, 0), seasonal_order=(1, 0, 2, 24), alpha=alpha,
+                                         metric=metric)
+        checkpoint = WalkForwardCheckpoint(checkpoint_file, fingerprint, every=checkpoint_every)
+        completed = checkpoint.load()
+        restored_rows = []
+        for record in completed:
+            anomalies.extend(record["anomalies"])
+            restored_rows.extend(record["rows"])
+            if params_out is not None and record["params"] is not None:
+                params_out[record["rows"][0]["datetime"]] = pd.Series(record["params"])
+            training_end = record["training_end"] + forecast_horizon
+        if restored_rows:
+            forecast_results = forecast_results.append(restored_rows, ignore_index=True)
+        if completed:
+            print(f"Resuming from {checkpoint_file}: {len(completed)} windows already done, "
+                  f"continuing at training size {training_end} (restored windows are not timed)")
+            run.increment("windows_resumed", len(completed))
+    
+    # Timed from here so the runtime covers only the windows computed in this run
+    start = time.time()
+    
+    if prefilter_threshold is not None:
+        with run_metrics.stage("prefilter"):
+            escalate = candidate_windows(ts_log, initial_train, forecast_horizon, prefilter_threshold)
+        print(f"Seasonal pre-filter: {int((~escalate).sum())} of {len(escalate)} windows skipped "
+              f"({(~escalate).mean() if len(escalate) else 0:.1%})")
+    
+    while training_end + forecast_horizon <= n:
+        if prefilter_threshold is not None and not escalate[(training_end - initial_train) // forecast_horizon]:
+            run.increment("windows_skipped")
+            if checkpoint is not None:
+                checkpoint.add({"training_end": training_end, "rows": [], "anomalies": [], "params": None})
+            training_end += forecast_horizon
+            continue
+        train_start = 0 if max_train is None else max(0, training_end - max_train)
+        train_data = ts_log.iloc[train_start:training_end]
+        test_data = ts_log.iloc[training_end: training_end + forecast_horizon]
+        if verbose:
+            print(f"{'Expanding' if max_train is None else 'Sliding'} window: Training size = {len(train_data)}, Test size = {len(test_data)}")
+        run.increment("windows")
+        
+        try:
+            with run.stage("fit", window_start=test_data.index[0], train_size=len(train_data)) as fit_stats:
+                model = ARIMA(train_data, order=(1, 0, 0), seasonal_order=(1, 0, 2, 24))
+                start_params = None
+                if warm_start is not None and test_data.index[0] in warm_start:
+                    start_params = warm_start[test_data.index[0]].copy()
+                    # The mean shifts with the sample fraction on the log scale
+                    if "const" in start_params.index:
+                        start_params["const"] = train_data.mean()
+                    start_params = np.asarray(start_params)
+                model_fit = model.fit(start_params=start_params)
+                retvals = getattr(model_fit, "mle_retvals", None) or {}
+                fit_stats["iterations"] = retvals.get("iterations")
+                fit_stats["converged"] = retvals.get("converged")
+            if fit_stats["converged"] is False:
+                run.increment("convergence_failures")
+            if params_out is not None:
+                params_out[test_data.index[0]] = pd.Series(model_fit.params, index=model.param_names)
+        except Exception as e:
+            print(f"Error fitting ARIMA model with training size {len(train_data)}: {e}")
+            run.increment("fit_errors")
+            if checkpoint is not None:
+                checkpoint.flush()
+                print(f"Completed windows saved to {checkpoint_file}; rerun to resume from this window")
+            interrupted = True
+            break
+        
+        try:
+            with run.stage("forecast", window_start=test_data.index[0]):
+                forecast_obj = model_fit.get_forecast(steps=forecast_horizon)
+                forecast_mean = np.array(forecast_obj.predicted_mean).flatten()
+                forecast_se = np.array(forecast_obj.se_mean).flatten()
+                conf_int = np.array(forecast_obj.conf_int(alpha=alpha))
+        except Exception as e:
+            print(f"Error during forecasting with training size {len(train_data)}: {e}")
+            run.increment("forecast_errors")
+            if checkpoint is not None:
+                checkpoint.add({"training_end": training_end, "rows": [], "anomalies": [], "params": None})
+            training_end += forecast_horizon
+            continue
+        
+        with run.stage("flag", window_start=test_data.index[0]):
+            window_rows = []
+            window_anomalies = []
+            test_index = test_data.index
+            for i, dt in enumerate(test_index):
+                actual_log = test_data.iloc[i]
+                forecast_log = forecast_mean[i]
+                lower_log = conf_int[i, 0]
+                upper_log = conf_int[i, 1]
+                # Back-transform from log scale
+                actual_val = np.expm1(actual_log)
+                forecast_val = np.expm1(forecast_log)
+                lower_bound = np.expm1(lower_log)
+                upper_bound = np.expm1(upper_log)
+            
+                # Determine the entry number for this timestamp
+                entry_num = entry_mapping.get(dt, None)
+            
+                if actual_val < lower_bound or actual_val > upper_bound:
+                    window_anomalies.append({
+                        "entry": entry_num,
+                        "datetime": dt,
+                        "actual": actual_val,
+                        "forecast": forecast_val,
+                        "lower_bound": lower_bound,
+                        "upper_bound": upper_bound
+                    })
+            
+                window_rows.append({
+                    "datetime": dt,
+                    "forecast": forecast_val,
+                    "lower": lower_bound,
+                    "upper": upper_bound,
+                    "actual": actual_val,
+                    "forecast_log": forecast_log,
+                    "lower_log": lower_log,
+                    "upper_log": upper_log,
+                    "actual_log": actual_log,
+                    "se_log": forecast_se[i]
+                })
+            anomalies.extend(window_anomalies)
+            forecast_results = forecast_results.append(window_rows, ignore_index=True)
+        
+        if checkpoint is not None:
+            checkpoint.add({
+                "training_end": training_end,
+                "rows": window_rows,
+                "anomalies": window_anomalies,
+                "params": dict(zip(model.param_names, np.asarray(model_fit.params))),
+            })
+        training_end += forecast_horizon
+    
+    if checkpoint is not None and not interrupted:
+        # Nothing left to resume; a rerun fits (and times) every window again
+        checkpoint.discard()
+    
+    runtime = time.time() - start
+    return anomalies, forecast_results, runtime
+
+def process_file(file_name, sample_fraction, max_train=None, checkpoint=False, prefilter_threshold=None):
+    
+    print(f"\n=== Processing file: {file_name} ({sample_fraction}% sample) ===")
+    with run_metrics.stage("load", file=file_name) as load_stats:
+        df = pd.read_parquet(file_name)
+        load_stats["rows"] = len(df)
+    with run_metrics.stage("build_datetime"):
+        df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+        df = df.sort_values("datetime").set_index("datetime")
+    
+    ts_raw = df["SUM_MB"].copy()
+    ts_raw = pd.to_numeric(ts_raw, errors='coerce').dropna()
+    
+    # Log transform for robust modeling
+    ts_log = np.log1p(ts_raw)
+    ts_log.name = "LOG_SUM_MB"
+    
+    base_name = os.path.splitext(file_name)[0]
+    checkpoint_file = f"{base_name}_SUM_MB_checkpoint.jsonl" if checkpoint else None
+    with run_metrics.stage("detect_anomalies", points=len(ts_log)) as detect_stats:
+        anomalies, forecast_results, runtime = detect_anomalies(ts_log, max_train=max_train,
+                                                                prefilter_threshold=prefilter_threshold,
+                                                                checkpoint_file=checkpoint_file)
+        detect_stats["anomalies"] = len(anomalies)
+    print(f"File {file_name}: Detected {len(anomalies)} anomalies in {runtime:.2f} sec.")
+    
+    # List each detected anomaly with its entry number
+    if anomalies:
+        print("\nAnomaly details:")
+        for anomaly in anomalies:
+            print(f"Entry: {anomaly['entry']}, Datetime: {anomaly['datetime']}, Actual: {anomaly['actual']:.2f}, "
+                  f"Forecast: {anomaly['forecast']:.2f}, Lower Bound: {anomaly['lower_bound']:.2f}, "
+                  f"Upper Bound: {anomaly['upper_bound']:.2f}")
+    
+    # Save forecast results as a day-partitioned dataset; only days not
+    # written by an earlier run (plus the last, possibly partial, day) are written
+    forecast_root = f"{base_name}_forecast_results_SUM_MB"
+    with run_metrics.stage("write_parquet") as write_stats:
+        # A changed input (e.g. late rows folded into old hours) rewrites every day
+        fingerprint = series_fingerprint(ts_log, max_train=max_train, prefilter_threshold=prefilter_threshold)
+        written = write_partitioned(forecast_results, forecast_root, fingerprint=fingerprint)
+        write_stats["partitions"] = len(written)
+        print(f"Saved {len(written)} day partitions of forecast results to {forecast_root}/")
+    
+        # Save anomalies the same way if any anomalies exist, or if an earlier
+        # run left days that a changed input may have made stale
+        anomalies_root = f"{base_name}_anomalies_SUM_MB"
+        if anomalies or os.path.isdir(anomalies_root):
+            anomalies_df = pd.DataFrame(anomalies)
+            written = write_partitioned(anomalies_df, anomalies_root, fingerprint=fingerprint)
+            print(f"Saved {len(written)} day partitions of anomalies to {anomalies_root}/")
+    
+    with run_metrics.stage("plot"):
+        import matplotlib.pyplot as plt
+
+        # Plot the results on original scale
+        plt.figure(figsize=(14, 7))
+        plt.plot(ts_raw.index, ts_raw, label="Actual SUM_MB", color="blue", alpha=0.6)
+        if not forecast_results.empty:
+            forecast_results['datetime'] = pd.to_datetime(forecast_results['datetime'])
+            plt.fill_between(forecast_results['datetime'],
+                             forecast_results['lower'],
+                             forecast_results['upper'],
+                             color="gray", alpha=0.3, label="99.73% Forecast CI")
+            plt.plot(forecast_results['datetime'], forecast_results['forecast'], color="orange", linestyle="--", label="Forecast Mean")
+        if anomalies:
+            anomaly_times = [a["datetime"] for a in anomalies]
+            anomaly_values = [a["actual"] for a in anomalies]
+            plt.scatter(anomaly_times, anomaly_values, color="red", label="Anomalies", zorder=5)
+        plt.xlabel("Datetime", fontsize=22)
+        plt.ylabel("SUM_MB", fontsize=22)
+        plt.title(f"ARIMA(1,0,0)(1,0,2)[24] Anomaly Detection ({sample_fraction}% Sample) - Original Scale", fontsize=26)
+        plt.xticks(fontsize=20)
+        plt.yticks(fontsize=20)
+        plt.legend(fontsize=20)
+        plt.tight_layout()
+        plt.show()
+    
+        # Plot the results on log-transformed scale
+        plt.figure(figsize=(14, 7))
+        plt.plot(ts_log.index, ts_log, label="Log(1+SUM_MB)", color="blue", alpha=0.6)
+        if not forecast_results.empty:
+            plt.fill_between(forecast_results['datetime'],
+                             forecast_results['lower_log'],
+                             forecast_results['upper_log'],
+                             color="gray", alpha=0.3, label="99.73% Forecast CI (log scale)")
+            plt.plot(forecast_results['datetime'], forecast_results['forecast_log'], color="orange", linestyle="--", label="Forecast Mean (log scale)")
+        if anomalies:
+            anomaly_times = [a["datetime"] for a in anomalies]
+            anomaly_log_values = [np.log1p(a["actual"]) for a in anomalies]
+            plt.scatter(anomaly_times, anomaly_log_values, color="red", label="Anomalies (log scale)", zorder=5)
+        plt.xlabel("Datetime", fontsize=22)
+        plt.ylabel("log(1+SUM_MB)", fontsize=22)
+        plt.title(f"ARIMA(1,0,0)(1,0,2)[24] Anomaly Detection ({sample_fraction}% Sample) - Log Scale", fontsize=26)
+        plt.xticks(fontsize=20)
+        plt.yticks(fontsize=20)
+        plt.legend(fontsize=20)
+        plt.tight_layout()
+        plt.show()
+    
+    return len(anomalies), runtime
+
+def main(checkpoint=False, prefilter_threshold=None, max_train=None):
+    overall_start = time.time()
+    
+    # Define file names for each sample fraction, including full aggregated data (100%)
+    sample_files = [
+        ("numeric_columns_hourly_1.parquet", 1),
+        #("numeric_columns_hourly_5.parquet", 5),
+        #("numeric_columns_hourly_15.parquet", 15),
+        #("numeric_columns_hourly_30.parquet", 30),
+        #("numeric_columns_hourly_50.parquet", 50),
+        #("numeric_columns_hourly_80.parquet", 80),
+        ("numeric_columns_hourly.parquet", 100)
+    ]
+    
+    run = run_metrics.start_run("arima_sum_mb")
+    summary = []
+    for file_name, perc in sample_files:
+        with run_metrics.stage("process_file", file=file_name, sample_fraction=perc):
+            anomaly_count, runtime = process_file(file_name, perc, max_train=max_train, checkpoint=checkpoint,
+                                                  prefilter_threshold=prefilter_threshold)
+        summary.append((perc, anomaly_count, runtime))
+    
+    overall_end = time.time()
+    total_overall = overall_end - overall_start
+    
+    print("\n=== Summary of Anomaly Detection Results ===")
+    for perc, count, rt in summary:
+        print(f"{perc}% sample: {count} anomalies detected, runtime: {rt:.2f} sec")
+    print(f"Total execution time (including plotting for all samples): {total_overall:.2f} sec")
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
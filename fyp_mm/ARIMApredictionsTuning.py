@@ -1,19 +1,24 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from pmdarima import auto_arima
 import warnings
 import time
+from . import run_metrics
 
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 def main():
+    import matplotlib.pyplot as plt
+    from pmdarima import auto_arima
+
     start_time = time.time()  # Start timing
+    run = run_metrics.start_run("arima_tuning")
 
   
-    df = pd.read_parquet("numeric_columns_hourly.parquet")
-    df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
-    df = df.sort_values("datetime").set_index("datetime")
+    with run_metrics.stage("load", file="numeric_columns_hourly.parquet"):
+        df = pd.read_parquet("numeric_columns_hourly.parquet")
+    with run_metrics.stage("build_datetime"):
+        df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+        df = df.sort_values("datetime").set_index("datetime")
 
     # Use "SUM_MB" as the numeric target
     ts_raw = df["SUM_MB"].copy()
@@ -27,24 +32,27 @@ def main():
 
   
     try:
-        tuned_model = auto_arima(
-            ts,
-            start_p=0, start_q=0,
-            max_p=3, max_q=3, max_d=2,
-            seasonal=True, m=24,  # hourly data with daily seasonality
-            stepwise=True, trace=True,
-            error_action='ignore',
-            suppress_warnings=True
-        )
+        with run_metrics.stage("auto_arima", points=len(ts)):
+            tuned_model = auto_arima(
+                ts,
+                start_p=0, start_q=0,
+                max_p=3, max_q=3, max_d=2,
+                seasonal=True, m=24,  # hourly data with daily seasonality
+                stepwise=True, trace=True,
+                error_action='ignore',
+                suppress_warnings=True
+            )
         print("Optimal ARIMA order:", tuned_model.order, "seasonal_order:", tuned_model.seasonal_order)
     except Exception as e:
         print("Error in auto_arima:", e)
+        run.finish()
         return
 
    
-    pred_obj = tuned_model.arima_res_.get_prediction(start=0, end=len(ts)-1)
-    pred_mean = pred_obj.predicted_mean   # on log scale
-    conf_int = pred_obj.conf_int(alpha=0.0027)  # ~99.73% confidence interval
+    with run_metrics.stage("forecast"):
+        pred_obj = tuned_model.arima_res_.get_prediction(start=0, end=len(ts)-1)
+        pred_mean = pred_obj.predicted_mean   # on log scale
+        conf_int = pred_obj.conf_int(alpha=0.0027)  # ~99.73% confidence interval
 
     forecast_results = pd.DataFrame({
         "datetime": ts.index,
@@ -102,6 +110,8 @@ def main():
 
     end_time = time.time()
     print(f"\nTotal execution time: {end_time - start_time:.2f} seconds.")
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import os
+
+stage_processing_100pct = {
+    "File Received": 250,
+    "Ingest":        625,
+    "Transform":     375,
+    "Supplement":    1125
+}
+
+stage_correction_cost = {
+    "File Received": 210,
+    "Ingest":        140,
+    "Transform":     80,
+    "Supplement":    300
+}
+
+sample_sizes = [1, 5, 15, 30, 50, 80, 100]
+
+# ARIMA(MB) anomaly counts:
+A_MB = np.array([11, 15, 16, 19, 20, 21, 22])
+# ARIMA(Sessions) anomaly counts:
+A_Sess = np.array([5, 9, 9, 10, 11, 14, 14])
+# IF anomalies (fixed at 1% sample), assumed constant:
+IF_anomalies = 2
+
+N = 50
+
+def load_anomaly_counts(fidelity_curve_file="fraction_fidelity_curve.csv"):
+    # Prefer measured counts from fraction_fidelity.py over the hard-coded ones above
+    if not os.path.exists(fidelity_curve_file):
+        return A_MB, A_Sess, IF_anomalies
+    curve = pd.read_csv(fidelity_curve_file)
+    counts = curve.set_index(["detector", "metric", "sample_pct"])["anomalies"]
+    try:
+        measured_MB = counts.loc["ARIMA", "SUM_MB"].reindex(sample_sizes).to_numpy(dtype=int)
+        measured_Sess = counts.loc["ARIMA", "SUM_SESSIONS"].reindex(sample_sizes).to_numpy(dtype=int)
+        measured_IF = int(counts.loc["IF", "ALL", 1])
+    except (KeyError, ValueError) as e:
+        print(f"{fidelity_curve_file} does not cover every sample size ({e}); using hard-coded counts")
+        return A_MB, A_Sess, IF_anomalies
+    print(f"Using anomaly counts from {fidelity_curve_file}")
+    return measured_MB, measured_Sess, measured_IF
+
+def linear_cost_100pct(cost_100pct, sample_pct):
+    return cost_100pct * (sample_pct / 100.0)
+
+def cost_matrices(A_MB, A_Sess, IF_anomalies):
+    results_by_stage = {}
+
+    for stage in stage_processing_100pct.keys():
+        # Initialize cost matrix (rows: MB sample sizes, cols: Sessions sample sizes)
+        cost_matrix = np.zeros((len(sample_sizes), len(sample_sizes)))
+    
+        # For each stage, get the 100% processing cost and correction cost.
+        base_stage_cost = stage_processing_100pct[stage]
+        corr_cost = stage_correction_cost[stage]
+    
+        # Loop over MB (row) and Sessions (column) sample sizes.
+        for i, p in enumerate(sample_sizes):
+            # MB model cost scaled to p%:
+            cost_MB = linear_cost_100pct(base_stage_cost, p)
+            anomalies_MB = A_MB[i]
+            for j, q in enumerate(sample_sizes):
+                # Sessions model cost scaled to q%:
+                cost_Sess = linear_cost_100pct(base_stage_cost, q)
+                anomalies_Sess = A_Sess[j]
+                # IF is fixed at 1% sample:
+                cost_IF = linear_cost_100pct(base_stage_cost, 1)
+            
+                # Compute total anomalies caught (union of MB, Sessions and IF)
+                total_anomalies_caught = anomalies_MB + anomalies_Sess + IF_anomalies
+            
+                missed = N - total_anomalies_caught
+                if missed < 0:
+                    missed = 0
+            
+                # Total processing cost: Sum of each model's cost.
+                total_processing = cost_MB + cost_Sess + cost_IF
+            
+           
+                total_cost = total_processing + missed * corr_cost
+            
+            
+                cost_matrix[i, j] = total_cost
+    
+        results_by_stage[stage] = cost_matrix
+
+    return results_by_stage
+
+def plot_cost_matrices(results_by_stage):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    for stage, matrix in results_by_stage.items():
+        plt.figure(figsize=(8, 6))
+        ax = sns.heatmap(
+            matrix,
+            annot=True,
+            fmt=".1f",
+            cmap="viridis",
+            xticklabels=[f"{q}%" for q in sample_sizes],
+            yticklabels=[f"{p}%" for p in sample_sizes]
+        )
+        ax.set_xlabel("ARIMA (Sessions) Sample Size", fontsize=14)
+        ax.set_ylabel("ARIMA (MB) Sample Size", fontsize=14)
+        ax.set_title(f"{stage} - Cost Matrix (IF fixed at 1%)", fontsize=16)
+        plt.tight_layout()
+        plt.show()
+
+def main(plot=True):
+    A_MB, A_Sess, IF_anomalies = load_anomaly_counts()
+    results_by_stage = cost_matrices(A_MB, A_Sess, IF_anomalies)
+    if plot:
+        plot_cost_matrices(results_by_stage)
+        return
+
+    labels = [f"{p}%" for p in sample_sizes]
+    for stage, matrix in results_by_stage.items():
+        print(f"\n{stage} - Cost Matrix (rows: ARIMA MB, columns: ARIMA Sessions, IF fixed at 1%)")
+        print(pd.DataFrame(matrix, index=labels, columns=labels).round(1).to_string())
+
+if __name__ == "__main__":
+    main()
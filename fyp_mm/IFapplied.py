@@ -0,0 +1,333 @@
+import shutil
+import pandas as pd
+import numpy as np
+from . import run_metrics
+from .partitioned_results import write_partitioned
+
+def _plotting():
+    # Plotting libraries are only imported (and styled) once something is drawn
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.rcParams.update({'font.size': 16})
+    sns.set_context("talk")
+    return plt, sns
+
+# pd.Timestamp.toordinal of the Unix epoch; ordinal = days since 1970-01-01 + this
+EPOCH_ORDINAL = pd.Timestamp("1970-01-01").toordinal()
+
+def date_ordinals(dates):
+    # Vectorised equivalent of .map(pd.Timestamp.toordinal)
+    days = (pd.to_datetime(dates, errors="coerce") - pd.Timestamp("1970-01-01")).dt.days + EPOCH_ORDINAL
+    return days.astype(np.int32) if days.notna().all() else days.astype(np.float32)
+
+def compact_features(df):
+    """
+    Converts the IF_Ready_Data columns to compact dtypes, one column at a time:
+    USAGE_DATE to int32 date ordinals, and SESSION_HOUR and the one-hot counts
+    to the smallest integer type that holds them (int8 for most). Numeric
+    columns with fractional values become float32.
+    """
+    if "USAGE_DATE" in df.columns:
+        df["USAGE_DATE"] = date_ordinals(df["USAGE_DATE"])
+    if "SESSION_HOUR" in df.columns:
+        if not np.issubdtype(df["SESSION_HOUR"].dtype, np.number):
+            df["SESSION_HOUR"] = pd.to_datetime(df["SESSION_HOUR"], errors="coerce").dt.hour
+    for col in df.columns:
+        if col == "USAGE_DATE" or not np.issubdtype(df[col].dtype, np.number):
+            continue
+        compact = pd.to_numeric(df[col], downcast="integer")
+        if np.issubdtype(compact.dtype, np.floating):
+            compact = compact.astype(np.float32)
+        df[col] = compact
+    return df
+
+def scaled_matrix(df, scaler=None):
+    """
+    The standardised feature matrix as a single float32 array. It is the
+    only copy of the data made for the model: StandardScaler(copy=False)
+    scales it in place, and IsolationForest works in float32 internally anyway.
+    With `scaler`, an already fitted StandardScaler, the matrix is transformed
+    with its statistics instead of being standardised on its own.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    X = df.to_numpy(dtype=np.float32)
+    if scaler is not None:
+        return scaler.transform(X, copy=False)
+    return StandardScaler(copy=False).fit_transform(X)
+
+def memory_mb(df):
+    return round(df.memory_usage(deep=True).sum() / 1e6, 1)
+
+def compare_feature_medians(df, numeric_cols):
+   
+    anomalies = df[df["anomaly"] == -1]
+    normal = df[df["anomaly"] == 1]
+    median_comparison = []
+    for col in numeric_cols:
+        median_anom = anomalies[col].median()
+        median_norm = normal[col].median()
+        diff = abs(median_anom - median_norm)
+        median_comparison.append({
+            "feature": col,
+            "median_anomaly": median_anom,
+            "median_normal": median_norm,
+            "abs_diff": diff
+        })
+    return pd.DataFrame(median_comparison).sort_values("abs_diff", ascending=False)
+
+def isolation_attributions(iso_forest, X, feature_names):
+    """
+    Per-row, per-feature isolation contributions for the rows in X.
+
+    Every split on a row's path through a tree credits its split feature with
+    1 / path length, so features that isolate the row in few splits score
+    highest; the credits are averaged over all trees. The paths of all rows
+    come from one decision_path call per tree and are mapped to features with
+    sparse matrix products, so no Python loop runs over rows. Credits are
+    summed in float64 and returned as float32.
+    """
+    from scipy import sparse
+
+    X = np.asarray(X, dtype=np.float32)
+    n_features = X.shape[1]
+    contributions = np.zeros((X.shape[0], n_features))
+    for tree, features in zip(iso_forest.estimators_, iso_forest.estimators_features_):
+        features = np.asarray(features)
+        paths = tree.decision_path(X[:, features]).tocsr().astype(np.float64)
+        split_features = tree.tree_.feature
+        internal = np.flatnonzero(split_features >= 0)
+        node_to_feature = sparse.csr_matrix(
+            (np.ones(len(internal)), (internal, features[split_features[internal]])),
+            shape=(tree.tree_.node_count, n_features))
+        path_length = np.asarray(paths.sum(axis=1)).ravel() - 1
+        weights = sparse.diags(1.0 / np.maximum(path_length, 1))
+        contributions += (weights @ paths @ node_to_feature).toarray()
+    contributions /= len(iso_forest.estimators_)
+    return pd.DataFrame(contributions.astype(np.float32), columns=[f"attr_{col}" for col in feature_names])
+
+def process_dataset(file_name, sample_label):
+    from sklearn.ensemble import IsolationForest
+    from sklearn.decomposition import PCA
+    plt, sns = _plotting()
+
+    print(f"\nProcessing dataset: {sample_label}")
+    print(f"Loading data from {file_name} ...")
+    try:
+        with run_metrics.stage("load", file=file_name) as load_stats:
+            df = pd.read_parquet(file_name, engine="pyarrow")
+            load_stats["rows"] = len(df)
+            load_stats["memory_mb"] = memory_mb(df)
+    except Exception as e:
+        print(f"Error loading {file_name}: {e}")
+        return None
+    
+    print(f"Data loaded. Shape: {df.shape}")
+    
+    print("Data types before conversion:")
+    print(df.dtypes)
+    
+    memory_before = memory_mb(df)
+    with run_metrics.stage("build_datetime") as compact_stats:
+        df = compact_features(df)
+        compact_stats["memory_mb"] = memory_mb(df)
+    
+    print("Data types after conversion:")
+    print(df.dtypes)
+    print(f"Memory: {memory_before} MB before conversion, {memory_mb(df)} MB after")
+    
+    # Scale the data.
+    feature_names = list(df.columns)
+    with run_metrics.stage("scale", columns=df.shape[1]):
+        X = scaled_matrix(df)
+    
+    # Apply Isolation Forest
+    with run_metrics.stage("fit"):
+        iso_forest = IsolationForest(random_state=42, contamination="auto")
+        iso_forest.fit(X)
+    
+    with run_metrics.stage("score"):
+        df["anomaly"] = iso_forest.predict(X).astype(np.int8)
+        df["anomaly_score"] = iso_forest.decision_function(X).astype(np.float32)
+    
+    num_anomalies = (df["anomaly"] == -1).sum()
+    total_rows = df.shape[0]
+    anomaly_rate = num_anomalies / total_rows if total_rows > 0 else 0
+    
+    print(f"\nAnomaly detection complete for {sample_label}.")
+    print(f"Number of anomalies found: {num_anomalies} out of {total_rows} rows ({anomaly_rate:.2%})")
+    print("Anomaly label counts:")
+    print(df["anomaly"].value_counts())
+    
+    anomalies = df[df["anomaly"] == -1]
+    anomaly_details_file = f"Anomaly_Details_{sample_label}.txt"
+    with run_metrics.stage("write_details"), open(anomaly_details_file, "w", encoding="utf-8") as f:
+        f.write(f"Anomaly Details for dataset: {sample_label}\n")
+        f.write(f"Total anomalies: {num_anomalies}\n\n")
+        # Write out each row's details
+        for idx, row in anomalies.iterrows():
+            f.write(f"Row Index: {idx}\n")
+            for col in df.columns:
+                f.write(f"  {col}: {row[col]}\n")
+            f.write("\n")
+    print(f"Anomaly details saved to {anomaly_details_file}")
+    
+    normal_data = df[df["anomaly"] == 1]
+    
+    if "SESSION_HOUR" in df.columns:
+        hourly_anomalies = anomalies.groupby("SESSION_HOUR").size().reset_index(name="anomaly_count")
+        print("\n--- Anomaly Count by SESSION_HOUR ---")
+        print(hourly_anomalies)
+        plt.figure(figsize=(10, 6))
+        sns.barplot(x="SESSION_HOUR", y="anomaly_count", data=hourly_anomalies, palette="coolwarm")
+        plt.title(f"Anomaly Count by SESSION_HOUR ({sample_label})", fontsize=20)
+        plt.xlabel("SESSION_HOUR", fontsize=18)
+        plt.ylabel("Anomaly Count", fontsize=18)
+        plt.xticks(fontsize=16)
+        plt.yticks(fontsize=16)
+        plt.show()
+    
+    if "COUNTRY" in df.columns and "SESSION_HOUR" in df.columns:
+        country_hour_anomalies = anomalies.groupby(["COUNTRY", "SESSION_HOUR"]).size().reset_index(name="count")
+        top_country_hour = country_hour_anomalies.sort_values("count", ascending=False).head(10)
+        print("\n--- Top 10 Anomaly Groups by COUNTRY and SESSION_HOUR ---")
+        print(top_country_hour)
+    
+    for col in ["TOTAL_MB_CHARGED", "TOTAL_SESSIONS"]:
+        if col in df.columns:
+            anomaly_median = anomalies[col].median()
+            normal_median = normal_data[col].median()
+            print(f"\nMedian {col} for anomalies: {anomaly_median}, for normal data: {normal_median}")
+    
+    numeric_cols = [col for col in df.columns if np.issubdtype(df[col].dtype, np.number)]
+    median_comparison_df = compare_feature_medians(df, numeric_cols)
+    print("\n--- Top 40 Feature Median Differences (Anomalies vs Normal) ---")
+    print(median_comparison_df.head(40))
+    
+    # Per-anomaly feature attribution; only flagged rows have any, so they are
+    # stored as their own dataset rather than as mostly empty result columns
+    anomaly_mask = (df["anomaly"] == -1).to_numpy()
+    attributions = None
+    if anomaly_mask.any():
+        with run_metrics.stage("attribution", rows=int(anomaly_mask.sum())):
+            attributions = isolation_attributions(iso_forest, X[anomaly_mask], feature_names)
+        attributions.index = df.index[anomaly_mask]
+        # Feature names repeat across anomalies, so the label is stored as category codes
+        top_feature = attributions.idxmax(axis=1).str.replace("attr_", "", n=1)
+        df["top_feature"] = pd.Categorical(top_feature.reindex(df.index), categories=feature_names)
+        print("\n--- Top 10 Features by Mean Isolation Contribution (Anomalies) ---")
+        print(attributions.mean().sort_values(ascending=False).head(10))
+    
+    #  PCA VISUALISATION 
+    with run_metrics.stage("pca"):
+        pca = PCA(n_components=2, random_state=42)
+        df_pca = pca.fit_transform(X)
+    df["pca_1"] = df_pca[:, 0]
+    df["pca_2"] = df_pca[:, 1]
+    
+    plt.figure(figsize=(10, 8))
+    sns.scatterplot(x="pca_1", y="pca_2", hue="anomaly", data=df,
+                    palette={1: "blue", -1: "red"}, alpha=0.7)
+    plt.title(f"PCA of Data with Isolation Forest Anomaly Labels ({sample_label})", fontsize=20)
+    plt.xlabel("PCA Component 1", fontsize=18)
+    plt.ylabel("PCA Component 2", fontsize=18)
+    plt.legend(title="Anomaly\n(1 = normal, -1 = anomaly)", fontsize=16, title_fontsize=18)
+    plt.xticks(fontsize=16)
+    plt.yticks(fontsize=16)
+    plt.show()
+    
+    from sklearn import tree
+    plt.figure(figsize=(20, 10))
+    tree.plot_tree(iso_forest.estimators_[0],
+                   feature_names=feature_names,
+                   filled=True,
+                   impurity=False,
+                   rounded=True)
+    plt.title("Visualization of the First Tree in the Isolation Forest", fontsize=20)
+    plt.show()
+    
+    # Save the results as a day-partitioned dataset. The PCA coordinates are
+    # only needed for the plot above and are not stored. The forest is refitted
+    # on every run, so every day is rewritten rather than mixing scores from
+    # different models.
+    output_root = f"IF_Results_{sample_label}"
+    results = df.drop(columns=["pca_1", "pca_2"])
+    results["datetime"] = (pd.to_datetime(results["USAGE_DATE"] - EPOCH_ORDINAL, unit="D")
+                           + pd.to_timedelta(results["SESSION_HOUR"], unit="h"))
+    with run_metrics.stage("write_parquet") as write_stats:
+        written = write_partitioned(results, output_root, mode="replace")
+        write_stats["partitions"] = len(written)
+    print(f"Results saved to {output_root}/ ({len(written)} day partitions written)")
+    
+    # Attributions of the flagged rows, keyed by datetime. The days holding
+    # anomalies change with every refit, so the previous run's are dropped first.
+    attributions_root = f"IF_Attributions_{sample_label}"
+    shutil.rmtree(attributions_root, ignore_errors=True)
+    if attributions is not None:
+        attributions.insert(0, "datetime", results.loc[attributions.index, "datetime"])
+        with run_metrics.stage("write_attributions", rows=len(attributions)):
+            written = write_partitioned(attributions, attributions_root, mode="replace")
+        print(f"Attributions of {len(attributions)} anomalies saved to {attributions_root}/ "
+              f"({len(written)} day partitions written)")
+    
+    # Return summary metrics for comparison
+    summary = {
+        "sample": sample_label,
+        "rows": total_rows,
+        "anomaly_count": num_anomalies,
+        "anomaly_rate": anomaly_rate
+    }
+    return summary
+
+def main():
+    plt, sns = _plotting()
+    datasets = {
+        "Full": "IF_Ready_Data.parquet",
+        #"15": "IF_Ready_Data_15.parquet",
+        #"30": "IF_Ready_Data_30.parquet",
+        #"50": "IF_Ready_Data_50.parquet",
+        #"80": "IF_Ready_Data_80.parquet",
+        #"05": "IF_Ready_Data_05.parquet",
+        "01": "IF_Ready_Data_01.parquet"
+    }
+    
+    run = run_metrics.start_run("isolation_forest")
+    summaries = []
+    
+    for label, file_name in datasets.items():
+        with run_metrics.stage("process_dataset", sample=label):
+            summary = process_dataset(file_name, label)
+        if summary:
+            summaries.append(summary)
+    
+    summary_df = pd.DataFrame(summaries)
+    print("\n--- Summary Comparison of Datasets ---")
+    print(summary_df)
+    
+    # Plot comparison of anomaly rates for each dataset
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x="sample", y="anomaly_rate", data=summary_df, palette="viridis")
+    plt.title("Anomaly Rate Comparison Across Datasets", fontsize=20)
+    plt.xlabel("Dataset Sample", fontsize=18)
+    plt.ylabel("Anomaly Rate", fontsize=18)
+    plt.ylim(0, summary_df["anomaly_rate"].max() * 1.1)
+    plt.xticks(fontsize=16)
+    plt.yticks(fontsize=16)
+    plt.show()
+    
+    # Plot comparison of anomaly counts for each dataset
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x="sample", y="anomaly_count", data=summary_df, palette="magma")
+    plt.title("Anomaly Count Comparison Across Datasets", fontsize=20)
+    plt.xlabel("Dataset Sample", fontsize=18)
+    plt.ylabel("Anomaly Count", fontsize=18)
+    plt.xticks(fontsize=16)
+    plt.yticks(fontsize=16)
+    plt.show()
+
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+import time
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from . import run_metrics
+from .partitioned_results import write_partitioned
+from .IFapplied import EPOCH_ORDINAL, compact_features, scaled_matrix
+
+# Columns that identify the hour rather than measure usage; they do not shrink with the sample
+HOUR_COLUMNS = ["USAGE_DATE", "SESSION_HOUR"]
+
+def to_full_scale(df, sample_pct):
+    """
+    An IF_Ready_Data_NN row sums an NN% row sample, so its SUM_MB,
+    SUM_SESSIONS and one-hot counts are about NN% of the full-data values.
+    Multiplying them by 100 / NN puts the sample on the full data's scale.
+    """
+    if sample_pct == 100:
+        return df
+    factor = np.float32(100 / sample_pct)
+    for col in df.columns:
+        if col not in HOUR_COLUMNS:
+            df[col] = df[col].astype(np.float32) * factor
+    return df
+
+def prepare_features(file_name, columns=None, scaler=None, sample_pct=100):
+    # Same conversions as IFapplied.process_dataset; `columns` aligns a sample's
+    # one-hot columns with the full dataset (categories missing from a sample are 0),
+    # `sample_pct` rescales the sample to full-data magnitudes and `scaler`
+    # applies the full dataset's standardisation to it
+    df = compact_features(pd.read_parquet(file_name, engine="pyarrow"))
+    if columns is not None:
+        df = df.reindex(columns=columns, fill_value=0)
+    df = to_full_scale(df, sample_pct)
+    return df, scaled_matrix(df, scaler)
+
+def share_matrix(X):
+    # Copies X into a shared memory block once; workers attach to it by name
+    shm = SharedMemory(create=True, size=X.nbytes)
+    np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+    return shm, (shm.name, X.shape, X.dtype.str)
+
+def attach_matrix(spec):
+    # Read-only view of a matrix placed with share_matrix; keep the returned
+    # block alive for as long as the view is used
+    name, shape, dtype = spec
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+def _fit_and_score(train_spec, score_spec, seed, label, forest_kwargs):
+    from sklearn.ensemble import IsolationForest
+
+    train_shm, X_train = attach_matrix(train_spec)
+    score_shm, X_score = attach_matrix(score_spec)
+    try:
+        start = time.time()
+        forest = IsolationForest(random_state=seed, **forest_kwargs).fit(X_train)
+        flags = forest.predict(X_score) == -1
+        scores = forest.decision_function(X_score)
+        runtime = time.time() - start
+    finally:
+        # The views must be released before the blocks can be closed
+        del X_train, X_score
+        train_shm.close()
+        score_shm.close()
+    return label, seed, flags, scores, runtime
+
+def run_ensemble(score_file, train_files, seeds, max_workers=None, min_agreement=0.5, contamination="auto"):
+    """
+    Trains one IsolationForest per (training sample, seed) pair in parallel and
+    scores every forest on the full dataset. `train_files` maps a label to
+    (file name, sample percentage).
+
+    The scaled full matrix and each training matrix are placed in shared memory
+    once, so workers read them in place instead of receiving a pickled copy per
+    task. Returns the full dataset with per-row flag frequency, mean and spread
+    of the anomaly score, a stability measure (1 = all forests agree) and an
+    ensemble label (-1 when at least `min_agreement` of the forests flag the row).
+    Every sample is rescaled to full-data magnitudes (to_full_scale) and then
+    standardised with the statistics of the scored data, so the forests are
+    trained in the feature space they score in.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    df = compact_features(pd.read_parquet(score_file, engine="pyarrow"))
+    scaler = StandardScaler(copy=False)
+    X_score = scaler.fit_transform(df.to_numpy(dtype=np.float32))
+    training = {}
+    for label, (file_name, sample_pct) in train_files.items():
+        if file_name == score_file:
+            training[label] = X_score
+            continue
+        try:
+            _, training[label] = prepare_features(file_name, columns=df.columns, scaler=scaler, sample_pct=sample_pct)
+        except Exception as e:
+            print(f"Error loading {file_name}: {e}")
+
+    blocks = []
+    try:
+        score_shm, score_spec = share_matrix(X_score)
+        blocks.append(score_shm)
+        train_specs = {}
+        for label, X in training.items():
+            if X is X_score:
+                train_specs[label] = score_spec
+                continue
+            shm, train_specs[label] = share_matrix(X)
+            blocks.append(shm)
+
+        forest_kwargs = {"contamination": contamination}
+        flags, scores, runs = [], [], []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_fit_and_score, train_specs[label], score_spec, seed, label, forest_kwargs)
+                       for label in train_specs for seed in seeds]
+            for future in futures:
+                label, seed, forest_flags, forest_scores, runtime = future.result()
+                flags.append(forest_flags)
+                scores.append(forest_scores)
+                runs.append({"sample": label, "seed": seed, "anomalies": int(forest_flags.sum()), "runtime": runtime})
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    flags = np.vstack(flags)
+    scores = np.vstack(scores)
+    flag_frequency = flags.mean(axis=0)
+    df["flag_frequency"] = flag_frequency
+    df["mean_score"] = scores.mean(axis=0)
+    df["score_std"] = scores.std(axis=0)
+    df["stability"] = np.abs(2 * flag_frequency - 1)
+    df["anomaly"] = np.where(flag_frequency >= min_agreement, -1, 1)
+    return df, pd.DataFrame(runs)
+
+def main():
+    start = time.time()
+    run = run_metrics.start_run("isolation_forest_ensemble")
+    train_files = {
+        "Full": ("IF_Ready_Data.parquet", 100),
+        "80": ("IF_Ready_Data_80.parquet", 80),
+        "50": ("IF_Ready_Data_50.parquet", 50),
+        "30": ("IF_Ready_Data_30.parquet", 30),
+        "15": ("IF_Ready_Data_15.parquet", 15),
+        "05": ("IF_Ready_Data_05.parquet", 5),
+        "01": ("IF_Ready_Data_01.parquet", 1)
+    }
+    seeds = list(range(10))
+
+    with run_metrics.stage("ensemble", forests=len(train_files) * len(seeds)):
+        df, runs = run_ensemble("IF_Ready_Data.parquet", train_files, seeds, max_workers=os.cpu_count())
+
+    print("\n--- Anomalies per forest ---")
+    print(runs.groupby("sample")["anomalies"].describe())
+    stable = (df["flag_frequency"] == 1).sum()
+    unstable = ((df["flag_frequency"] > 0) & (df["flag_frequency"] < 1)).sum()
+    print(f"\nRows flagged by every forest: {stable}")
+    print(f"Rows flagged by some but not all forests: {unstable}")
+    print(f"Ensemble anomalies (flagged by at least half the forests): {(df['anomaly'] == -1).sum()}")
+
+    df["datetime"] = (pd.to_datetime(df["USAGE_DATE"] - EPOCH_ORDINAL, unit="D")
+                      + pd.to_timedelta(df["SESSION_HOUR"], unit="h"))
+    # Every forest is refitted and every row rescored, so all days are rewritten
+    written = write_partitioned(df, "IF_Ensemble_Results", mode="replace")
+    print(f"Results saved to IF_Ensemble_Results/ ({len(written)} day partitions written)")
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+    run.finish()
+
+if __name__ == "__main__":
+    main()
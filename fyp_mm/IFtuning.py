@@ -0,0 +1,149 @@
+import pandas as pd
+import numpy as np
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import run_metrics
+from .IFensemble import prepare_features, share_matrix, attach_matrix
+from .agreement import compare_anomaly_sets
+
+SEARCH_SPACE = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_samples": [64, 128, 256, 512],
+    "max_features": [0.25, 0.5, 1.0],
+}
+CONTAMINATIONS = ["auto", 0.005, 0.01, 0.02, 0.05]
+# Settings used by IFapplied.process_dataset, the reference for agreement
+REFERENCE = {"n_estimators": 100, "max_samples": "auto", "max_features": 1.0, "contamination": "auto"}
+
+_X = None
+_shm = None
+
+def _init_worker(spec):
+    # Each worker attaches to the shared feature matrix once, not once per task
+    global _X, _shm
+    _shm, _X = attach_matrix(spec)
+
+def _cache_path(cache_dir, data_key, params, seed):
+    key = json.dumps({"data": data_key, "seed": seed, **params}, sort_keys=True)
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".joblib")
+
+def _contamination_flags(scores, contamination):
+    # Same threshold rule IsolationForest.fit applies to its training data:
+    # -0.5 for "auto", otherwise the contamination percentile of the scores
+    offset = -0.5 if contamination == "auto" else np.percentile(scores, 100.0 * contamination)
+    return scores < offset
+
+def _evaluate(params, seed, contaminations, cache_path):
+    """
+    Fits (or loads from the cache) one forest and returns its flags for every
+    contamination level. Contamination only moves the score threshold, so the
+    trees and the scores are shared by all contamination levels.
+    """
+    import joblib
+    from sklearn.ensemble import IsolationForest
+
+    if cache_path is not None and os.path.exists(cache_path):
+        cached = joblib.load(cache_path)
+        forest, fit_time, cache_hit = cached["forest"], cached["fit_time"], True
+    else:
+        start = time.time()
+        forest = IsolationForest(random_state=seed, **params).fit(_X)
+        fit_time = time.time() - start
+        cache_hit = False
+        if cache_path is not None:
+            joblib.dump({"forest": forest, "fit_time": fit_time}, cache_path)
+    start = time.time()
+    scores = forest.score_samples(_X)
+    score_time = time.time() - start
+    flags = {c: _contamination_flags(scores, c) for c in contaminations}
+    return params, flags, fit_time, score_time, cache_hit
+
+def search(file_name, search_space=SEARCH_SPACE, contaminations=CONTAMINATIONS, labels=None, seed=42,
+           max_workers=None, cache_dir="if_search_cache"):
+    """
+    Parallel grid search over n_estimators, max_samples, max_features and
+    contamination. Each configuration is scored on agreement with the reference
+    run (or with `labels`, a boolean array of injected anomalies) and on fit and
+    score time. Fitted forests are cached on disk keyed by data and settings.
+    """
+    _, X = prepare_features(file_name)
+    data_key = hashlib.sha1(X.tobytes()).hexdigest()
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    reference_params = {k: v for k, v in REFERENCE.items() if k != "contamination"}
+    grid = [dict(zip(search_space, values)) for values in itertools.product(*search_space.values())]
+    grid = [params for params in grid if params["max_samples"] <= len(X)]
+    tasks = [reference_params] + grid
+
+    shm, spec = share_matrix(X)
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(spec,)) as executor:
+            futures = [executor.submit(_evaluate, params, seed, contaminations,
+                                       None if cache_dir is None else _cache_path(cache_dir, data_key, params, seed))
+                       for params in tasks]
+            for future in as_completed(futures):
+                results.append(future.result())
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if labels is not None:
+        truth = np.asarray(labels, dtype=bool)
+    else:
+        reference_result = next(r for r in results if r[0] == reference_params)
+        truth = reference_result[1][REFERENCE["contamination"]]
+    # Flagged row positions, compared the same way as anomaly timestamps elsewhere
+    truth = set(np.flatnonzero(truth))
+
+    rows = []
+    for params, flags, fit_time, score_time, cache_hit in results:
+        for contamination, config_flags in flags.items():
+            rows.append({
+                **params,
+                "contamination": contamination,
+                "anomalies": int(config_flags.sum()),
+                "fit_time": fit_time,
+                "score_time": score_time,
+                "total_time": fit_time + score_time,
+                "cached": cache_hit,
+                **compare_anomaly_sets(truth, set(np.flatnonzero(config_flags))),
+            })
+    return pd.DataFrame(rows).sort_values("total_time").reset_index(drop=True)
+
+def fastest_within_tolerance(results, min_jaccard=0.9):
+    # Cheapest configuration whose anomalies agree closely enough with the reference
+    eligible = results[results["jaccard"] >= min_jaccard]
+    if eligible.empty:
+        return None
+    return eligible.sort_values(["total_time", "jaccard"], ascending=[True, False]).iloc[0]
+
+def main():
+    start = time.time()
+    run = run_metrics.start_run("isolation_forest_tuning")
+    with run_metrics.stage("search"):
+        results = search("IF_Ready_Data_01.parquet", max_workers=os.cpu_count())
+
+    print("\n--- 10 fastest configurations ---")
+    print(results.head(10).to_string(index=False))
+    results.to_csv("if_search_results.csv", index=False)
+    print("Saved all configurations to if_search_results.csv")
+
+    for tolerance in [0.95, 0.9, 0.8]:
+        best = fastest_within_tolerance(results, tolerance)
+        if best is None:
+            print(f"\nNo configuration reaches Jaccard >= {tolerance}")
+            continue
+        print(f"\nFastest configuration with Jaccard >= {tolerance}: n_estimators={best['n_estimators']}, "
+              f"max_samples={best['max_samples']}, max_features={best['max_features']}, "
+              f"contamination={best['contamination']} ({best['total_time']:.2f} sec, Jaccard {best['jaccard']:.3f})")
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+    run.finish()
+
+if __name__ == "__main__":
+    main()
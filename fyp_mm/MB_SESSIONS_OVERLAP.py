@@ -0,0 +1,33 @@
+import pandas as pd
+from .partitioned_results import read_range
+
+# Restrict the comparison to a date range, e.g. START, END = "2024-03-01", "2024-04-01"
+START, END = None, None
+
+
+def main(start=START, end=END):
+    # Day-partitioned anomaly datasets written by ARIMA_LOG_TRANSFORM_VISUALS and ARIMApredictions
+    sessions_root = "numeric_columns_hourly_anomalies_SUM_SESSIONS"
+    mb_root = "numeric_columns_hourly_anomalies_SUM_MB"
+    anomalies1 = read_range(sessions_root, start, end)
+    anomalies2 = read_range(mb_root, start, end)
+
+    print(f"Anomalies from {sessions_root}/ (first 5 rows):")
+    print(anomalies1.head())
+    print(f"\nAnomalies from {mb_root}/ (first 5 rows):")
+    print(anomalies2.head())
+
+
+    anomaly_indices1 = set(anomalies1['entry'])
+    anomaly_indices2 = set(anomalies2['entry'])
+
+    print(f"\nTotal anomalies in {sessions_root}/: {len(anomaly_indices1)}")
+    print(f"Total anomalies in {mb_root}/: {len(anomaly_indices2)}")
+
+    overlap_indices = anomaly_indices1.intersection(anomaly_indices2)
+    print(f"\nNumber of overlapping anomalies: {len(overlap_indices)}")
+    print("Overlapping row indices:", sorted(overlap_indices))
+
+
+if __name__ == "__main__":
+    main()
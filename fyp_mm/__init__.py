@@ -0,0 +1 @@
+# Modules are imported on demand (see cli.py), so importing the package is cheap
@@ -0,0 +1,10 @@
+def compare_anomaly_sets(reference, candidate):
+    # Agreement between two anomaly sets (timestamps or row positions), treating
+    # the reference run as ground truth
+    overlap = len(reference & candidate)
+    union = len(reference | candidate)
+    return {
+        "precision": overlap / len(candidate) if candidate else 1.0,
+        "recall": overlap / len(reference) if reference else 1.0,
+        "jaccard": overlap / union if union else 1.0,
+    }
@@ -0,0 +1,56 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+from .ARIMApredictions import detect_anomalies
+from .agreement import compare_anomaly_sets
+
+warnings.filterwarnings("ignore")
+
+def benchmark_training_window(ts_log, max_train_options, initial_train=120, forecast_horizon=48):
+
+    expanding, _, expanding_runtime = detect_anomalies(ts_log, initial_train, forecast_horizon, verbose=False)
+    expanding_times = {a["datetime"] for a in expanding}
+    rows = [{
+        "mode": "expanding",
+        "max_train": None,
+        "anomalies": len(expanding_times),
+        "runtime": expanding_runtime,
+        "speedup": 1.0,
+        "precision": 1.0, "recall": 1.0, "jaccard": 1.0,
+    }]
+    for max_train in max_train_options:
+        sliding, _, sliding_runtime = detect_anomalies(
+            ts_log, initial_train, forecast_horizon, verbose=False, max_train=max_train)
+        sliding_times = {a["datetime"] for a in sliding}
+        rows.append({
+            "mode": "sliding",
+            "max_train": max_train,
+            "anomalies": len(sliding_times),
+            "runtime": sliding_runtime,
+            "speedup": expanding_runtime / sliding_runtime if sliding_runtime > 0 else np.nan,
+            **compare_anomaly_sets(expanding_times, sliding_times),
+        })
+        print(f"max_train={max_train}: {len(sliding_times)} anomalies in {sliding_runtime:.2f} sec "
+              f"(expanding: {len(expanding_times)} in {expanding_runtime:.2f} sec)")
+    return pd.DataFrame(rows)
+
+def main():
+    start = time.time()
+    df = pd.read_parquet("numeric_columns_hourly.parquet")
+    df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+    df = df.sort_values("datetime").set_index("datetime")
+
+    ts_raw = pd.to_numeric(df["SUM_MB"], errors='coerce').dropna()
+    ts_log = np.log1p(ts_raw)
+    ts_log.name = "LOG_SUM_MB"
+
+    # 2, 4 and 8 weeks of hourly history
+    results = benchmark_training_window(ts_log, [24 * 7 * 2, 24 * 7 * 4, 24 * 7 * 8])
+    print("\n=== Expanding vs sliding training window ===")
+    print(results.to_string(index=False))
+    results.to_csv("training_window_benchmark.csv", index=False)
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+
+if __name__ == "__main__":
+    main()
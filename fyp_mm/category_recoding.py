@@ -0,0 +1,177 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import time
+import pyarrow.parquet as pq
+from . import run_metrics
+
+CATEGORICAL_COLUMNS = ["COUNTRY", "OPERATOR", "SERVINGNETWORK", "RAT", "APN", "REGISTRATION_COHORT", "ECUTYPE"]
+OTHER = "Other"
+# Missing values are '-1' in SAMPLE_DATA; they are never folded into 'Other'
+# because the pivots drop them (WHERE col <> '-1')
+MISSING = "-1"
+
+class MisraGries:
+    """
+    Misra-Gries heavy-hitter summary of one column with at most `capacity`
+    counters.
+
+    Each counter is a lower bound on its value's true count and undercounts it
+    by at most `error`, which never exceeds total / (capacity + 1). update()
+    merges the exact value counts of a whole batch: counters are added, and if
+    more than `capacity` remain, the (capacity + 1)-th largest count is
+    subtracted from all of them and the non-positive ones are dropped. While a
+    column has no more than `capacity` distinct values the summary is exact.
+    """
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.total = 0
+        self.error = 0
+
+    def update(self, value_counts):
+        self.total += int(value_counts.sum())
+        counts = self.counts.add(value_counts, fill_value=0)
+        if len(counts) > self.capacity:
+            cut_index = len(counts) - self.capacity - 1
+            cut = np.partition(counts.to_numpy(), cut_index)[cut_index]
+            counts = counts[counts > cut] - cut
+            self.error += int(cut)
+        self.counts = counts.astype(np.int64)
+
+    def candidates(self, fraction):
+        # Every value with a true count above fraction * total: counters are
+        # lower bounds short by at most `error`, so compare the upper bound
+        return self.counts[self.counts + self.error > fraction * self.total]
+
+def fit_category_dictionary(file_name, columns=CATEGORICAL_COLUMNS, threshold=0.01, capacity=1000,
+                            batch_size=1_000_000):
+    """
+    Finds the frequent values of every categorical column in a streaming pass
+    over the raw file, with one Misra-Gries summary per column.
+
+    The summaries only narrow each column down to at most `capacity`
+    candidates; unless every summary stayed exact, a second pass counts the
+    candidates exactly, so the kept values are the same as with the
+    HAVING COUNT(*) > (SELECT COUNT(*) * 0.01 ...) rule in One hot encoding.sql.
+
+    Returns the category dictionary: for each column the values seen in more
+    than `threshold` of the rows (recode() maps everything else to 'Other'),
+    their exact counts, and the summary's error bound.
+    """
+    sketches = {col: MisraGries(capacity) for col in columns}
+    parquet_file = pq.ParquetFile(file_name)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(columns)):
+        df = batch.to_pandas()
+        for col in columns:
+            sketches[col].update(df[col].fillna(MISSING).astype(str).value_counts())
+
+    counts = {col: sketch.candidates(threshold) for col, sketch in sketches.items()}
+    if any(sketch.error > 0 for sketch in sketches.values()):
+        candidates = {col: set(candidate_counts.index) for col, candidate_counts in counts.items()}
+        counts = {col: pd.Series(dtype=np.int64) for col in columns}
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(columns)):
+            df = batch.to_pandas()
+            for col in columns:
+                values = df[col].fillna(MISSING).astype(str)
+                counts[col] = counts[col].add(values[values.isin(candidates[col])].value_counts(), fill_value=0)
+
+    dictionary = {"source": file_name, "threshold": threshold, "capacity": capacity, "columns": {}}
+    for col, sketch in sketches.items():
+        frequent = counts[col][counts[col] > threshold * sketch.total].sort_values(ascending=False)
+        dictionary["columns"][col] = {
+            "keep": [value for value in frequent.index if value != MISSING],
+            "counts": {value: int(count) for value, count in frequent.items()},
+            "rows": sketch.total,
+            "max_error": sketch.error,
+        }
+    return dictionary
+
+def save_dictionary(dictionary, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dictionary, f, indent=2)
+
+def load_dictionary(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def recode(df, dictionary, columns=None):
+    """
+    Replaces every value not kept by the dictionary with 'Other', in place of
+    the CASE WHEN col IN (...) THEN col ELSE 'Other' END blocks. The recoded
+    columns are categoricals with a fixed category order, so the one-hot
+    columns built from them are the same for every file and batch.
+    """
+    for col in columns or list(dictionary["columns"]):
+        keep = dictionary["columns"][col]["keep"]
+        values = df[col].fillna(MISSING).astype(str)
+        values = values.where(values.isin(keep) | (values == MISSING), OTHER)
+        df[col] = pd.Categorical(values, categories=keep + [OTHER, MISSING])
+    return df
+
+def build_features(file_name, dictionary, output_file, batch_size=1_000_000):
+    """
+    Builds hourly features from raw rows in one more scan: SUM_MB and
+    SUM_SESSIONS plus one count column per kept category (and 'Other') of
+    every dictionary column, i.e. the AGGREGATE_NUMERIC and
+    AGGREGATE_PIVOTS_* procedures applied to the recoded rows. Only the hourly
+    totals are held between batches. Without a dictionary only the two sums
+    are built.
+    """
+    columns = list(dictionary["columns"]) if dictionary is not None else []
+    hour_keys = ["USAGE_DATE", "SESSION_HOUR"]
+    parquet_file = pq.ParquetFile(file_name)
+    totals = None
+    for batch in parquet_file.iter_batches(batch_size=batch_size,
+                                           columns=hour_keys + ["TOTAL_MB_CHARGED", "TOTAL_SESSIONS"] + columns):
+        df = batch.to_pandas()
+        df = df[df["SESSION_HOUR"] != -1].copy()
+        if columns:
+            df = recode(df, dictionary, columns)
+        pieces = [df.groupby(hour_keys)[["TOTAL_MB_CHARGED", "TOTAL_SESSIONS"]].sum()
+                  .rename(columns={"TOTAL_MB_CHARGED": "SUM_MB", "TOTAL_SESSIONS": "SUM_SESSIONS"})]
+        for col in columns:
+            counts = df.groupby(hour_keys + [col], observed=True).size().unstack(col, fill_value=0)
+            counts = counts.drop(columns=[MISSING], errors="ignore")
+            counts.columns = [f"{col}_{value}" for value in counts.columns]
+            pieces.append(counts)
+        batch_features = pd.concat(pieces, axis=1)
+        totals = batch_features if totals is None else totals.add(batch_features, fill_value=0)
+
+    if totals is None:
+        # A partition with no usable rows (e.g. a day that is still empty) contributes no hours
+        features = pd.DataFrame(columns=hour_keys + ["SUM_MB", "SUM_SESSIONS"])
+        features.to_parquet(output_file, index=False)
+        return features
+    features = totals.fillna(0).sort_index().reset_index()
+    count_cols = [col for col in features.columns if col not in hour_keys + ["SUM_MB", "SUM_SESSIONS"]]
+    features[count_cols] = features[count_cols].astype(np.int64)
+    features.to_parquet(output_file, index=False)
+    return features
+
+def main(file_name="SAMPLE_DATA.parquet", dictionary_file="category_dictionary.json", refit=False):
+    start = time.time()
+    run = run_metrics.start_run("category_recoding")
+    if os.path.exists(dictionary_file) and not refit:
+        dictionary = load_dictionary(dictionary_file)
+        print(f"Loaded category dictionary from {dictionary_file}")
+    else:
+        with run_metrics.stage("fit_dictionary", file=file_name):
+            dictionary = fit_category_dictionary(file_name)
+        save_dictionary(dictionary, dictionary_file)
+        print(f"Saved category dictionary to {dictionary_file} ({time.time() - start:.2f} sec)")
+    for col, entry in dictionary["columns"].items():
+        print(f"{col}: keeping {len(entry['keep'])} values, summary error {entry['max_error']} of {entry['rows']} rows")
+
+    base_name = os.path.splitext(file_name)[0]
+    output_file = f"{base_name}_recoded_features.parquet"
+    with run_metrics.stage("build_features") as feature_stats:
+        features = build_features(file_name, dictionary, output_file)
+        feature_stats["hours"] = len(features)
+    print(f"Saved {features.shape[1]} hourly features for {len(features)} hours to {output_file}")
+    run_summary = run.finish()
+    print(f"Finished in {time.time() - start:.2f} sec (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import importlib
+import sys
+
+# Each subcommand resolves to (module, keyword arguments for its main(), argv).
+# The module is imported only after the command line has been parsed, so
+# `fyp-mm --help` and the light subcommands never load statsmodels, sklearn or
+# matplotlib; those are imported inside the functions that need them.
+ARIMA_MODULES = {
+    "SUM_MB": "ARIMApredictions",
+    "SUM_SESSIONS": "ARIMA_LOG_TRANSFORM_VISUALS",
+    "joint": "ARIMAjointPredictions",
+}
+IFOREST_MODULES = {
+    "applied": "IFapplied",
+    "ensemble": "IFensemble",
+    "search": "IFtuning",
+}
+OVERLAP_MODULES = {
+    "mb-sessions": "MB_SESSIONS_OVERLAP",
+    "if-arima": "IF_ARIMA_OL",
+}
+
+# Libraries that dominate import time; startup_benchmark.py checks which of
+# these a subcommand pulls in before it starts working
+HEAVY_MODULES = ["matplotlib", "seaborn", "statsmodels", "sklearn", "pmdarima", "scipy", "joblib"]
+
+def arima_kwargs(args):
+    # The joint model has no checkpoint or pre-filter, so those flags only reach the single-metric scripts
+    if args.metric == "joint":
+        return {"max_train": args.max_train}
+    return {"max_train": args.max_train, "checkpoint": args.checkpoint, "prefilter_threshold": args.prefilter}
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="fyp-mm", description="Usage anomaly detection pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("prep", help="stationarity tests and ACF/PACF plots for SUM_MB")
+    p.add_argument("--file", default="numeric_columns_hourly.parquet")
+    p.set_defaults(target=lambda a: ("ARIMA_prep", {"file_name": a.file}, None))
+
+    p = sub.add_parser("arima", help="walk-forward ARIMA anomaly detection")
+    p.add_argument("--metric", choices=sorted(ARIMA_MODULES), default="SUM_MB")
+    p.add_argument("--max-train", type=int, default=None, metavar="HOURS",
+                   help="fit each window on the last HOURS points only (sliding window) instead of all history")
+    p.add_argument("--checkpoint", action="store_true",
+                   help="make the walk-forward resumable after a crash (SUM_MB and SUM_SESSIONS only)")
+    p.add_argument("--prefilter", type=float, default=None, metavar="THRESHOLD",
+                   help="skip windows whose seasonal robust z-scores stay below THRESHOLD (SUM_MB and SUM_SESSIONS only)")
+    p.set_defaults(target=lambda a: (ARIMA_MODULES[a.metric], arima_kwargs(a), None))
+
+    p = sub.add_parser("tune", help="auto_arima order search")
+    p.set_defaults(target=lambda a: ("ARIMApredictionsTuning", {}, None))
+
+    p = sub.add_parser("iforest", help="IsolationForest detection, ensemble or hyperparameter search")
+    p.add_argument("--mode", choices=sorted(IFOREST_MODULES), default="applied")
+    p.set_defaults(target=lambda a: (IFOREST_MODULES[a.mode], {}, None))
+
+    p = sub.add_parser("overlap", help="overlap between anomaly sets")
+    p.add_argument("--pair", choices=sorted(OVERLAP_MODULES), default="mb-sessions")
+    p.add_argument("--start", default=None, help="first day to compare (mb-sessions only)")
+    p.add_argument("--end", default=None, help="day after the last one to compare (mb-sessions only)")
+    p.set_defaults(target=lambda a: (OVERLAP_MODULES[a.pair],
+                                     {"start": a.start, "end": a.end} if a.pair == "mb-sessions" else {}, None))
+
+    p = sub.add_parser("cost", help="cost-benefit matrices over sample sizes")
+    p.add_argument("--no-plot", action="store_true", help="print the matrices instead of drawing heatmaps")
+    p.set_defaults(target=lambda a: ("Cost_Benefit_Analysis_2", {"plot": not a.no_plot}, None))
+
+    p = sub.add_parser("profile", help="slowest stages recorded in a run metrics file")
+    p.add_argument("metrics_file", nargs="?", default="run_metrics.jsonl")
+    p.set_defaults(target=lambda a: ("run_metrics", {}, [a.metrics_file]))
+
+    p = sub.add_parser("serve", help="local HTTP scoring service for ARIMA and IsolationForest")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--max-batch", type=int, default=256, help="most records scored in one micro-batch")
+    p.add_argument("--max-wait-ms", type=float, default=2.0, help="longest wait to fill a micro-batch")
+    p.add_argument("--timeout", type=float, default=5.0, help="seconds before a request gets a 503")
+    p.add_argument("--no-iforest", action="store_true", help="serve the ARIMA models only")
+    p.set_defaults(target=lambda a: ("scoring_service", {
+        "mode": "serve", "host": a.host, "port": a.port, "max_batch": a.max_batch, "max_wait": a.max_wait_ms / 1000,
+        "timeout": a.timeout, "if_file": None if a.no_iforest else "IF_Ready_Data.parquet"}, None))
+
+    p = sub.add_parser("loadtest", help="throughput and latency of a running scoring service")
+    p.add_argument("--url", default="http://127.0.0.1:8765")
+    p.add_argument("--requests", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--records", type=int, default=1, help="records per request")
+    p.set_defaults(target=lambda a: ("scoring_service", {
+        "mode": "loadtest", "base_url": a.url, "requests": a.requests, "concurrency": a.concurrency,
+        "records_per_request": a.records}, None))
+
+    p = sub.add_parser("segments", help="per-segment ARIMA detection from the raw sample")
+    p.set_defaults(target=lambda a: ("segment_forecasting", {}, None))
+
+    p = sub.add_parser("vehicles", help="per-vehicle rolling robust z-scores from the raw sample")
+    p.add_argument("--file", default="SAMPLE_DATA.parquet")
+    p.add_argument("--partitions", type=int, default=64, help="vehicle-hash partitions (raise for bigger fleets)")
+    p.add_argument("--workers", type=int, default=None)
+    p.set_defaults(target=lambda a: ("vehicle_anomalies",
+                                     {"file_name": a.file, "n_partitions": a.partitions, "max_workers": a.workers}, None))
+
+    p = sub.add_parser("recode", help="fit heavy-hitter category dictionaries and build recoded hourly features")
+    p.add_argument("--file", default="SAMPLE_DATA.parquet")
+    p.add_argument("--dictionary", default="category_dictionary.json")
+    p.add_argument("--refit", action="store_true", help="rebuild the dictionary even if the file exists")
+    p.set_defaults(target=lambda a: ("category_recoding",
+                                     {"file_name": a.file, "dictionary_file": a.dictionary, "refit": a.refit}, None))
+
+    p = sub.add_parser("rollup", help="fold new or changed raw partitions into the materialized hourly rollup")
+    p.add_argument("--raw-dir", default="SAMPLE_DATA", help="directory of raw Parquet partitions")
+    p.add_argument("--store", default="hourly_rollup")
+    p.add_argument("--dictionary", default=None, help="category dictionary for the category count columns")
+    p.set_defaults(target=lambda a: ("hourly_rollup",
+                                     {"raw_dir": a.raw_dir, "store": a.store, "dictionary_file": a.dictionary}, None))
+
+    p = sub.add_parser("prefilter", help="seasonal prefilter recall and runtime")
+    p.set_defaults(target=lambda a: ("seasonal_prefilter", {}, None))
+
+    p = sub.add_parser("window-bench", help="compare ARIMA training window lengths")
+    p.set_defaults(target=lambda a: ("benchmark_training_window", {}, None))
+
+    p = sub.add_parser("kernel", help="re-score ARIMA history with fixed parameters using the NumPy kernel")
+    p.add_argument("--file", default="numeric_columns_hourly.parquet")
+    p.add_argument("--metric", choices=["SUM_MB", "SUM_SESSIONS"], default="SUM_MB")
+    p.set_defaults(target=lambda a: ("sarima_kernel", {"file_name": a.file, "metric": a.metric}, None))
+
+    p = sub.add_parser("sweep", help="anomaly counts over interval alphas")
+    p.add_argument("forecast_file", nargs="?", default="numeric_columns_hourly_forecast_results_SUM_MB")
+    p.set_defaults(target=lambda a: ("interval_thresholds", {}, [a.forecast_file]))
+
+    p = sub.add_parser("fidelity", help="anomaly fidelity across sample fractions")
+    p.set_defaults(target=lambda a: ("fraction_fidelity", {}, None))
+
+    p = sub.add_parser("combine", help="combine anomaly files into one text summary")
+    p.set_defaults(target=lambda a: ("combine_results", {}, None))
+
+    p = sub.add_parser("compact", help="compact the partitions of a results dataset")
+    p.add_argument("root")
+    p.add_argument("time_col", nargs="?", default="datetime")
+    p.set_defaults(target=lambda a: ("partitioned_results", {}, [a.root, a.time_col]))
+
+    p = sub.add_parser("analysis", help="summary queries against the Snowflake sample table")
+    p.set_defaults(target=lambda a: ("data_analysis", {}, None))
+
+    p = sub.add_parser("startup-bench", help="time how long each subcommand takes to start")
+    p.set_defaults(target=lambda a: ("startup_benchmark", {}, None))
+
+    return parser
+
+def resolve(argv=None):
+    """
+    Parses the command line and imports the module behind the subcommand.
+    Returns the module's main() with its arguments bound, ready to run.
+    """
+    args = build_parser().parse_args(argv)
+    module_name, kwargs, module_argv = args.target(args)
+    module = importlib.import_module(f"{__package__}.{module_name}")
+
+    def run():
+        # Modules that read their own arguments from sys.argv get them there
+        if module_argv is not None:
+            sys.argv = [module_name] + module_argv
+        return module.main(**kwargs)
+
+    return run
+
+def main(argv=None):
+    return resolve(argv)()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+from . import run_metrics
+from .agreement import compare_anomaly_sets
+
+warnings.filterwarnings("ignore")
+
+# Largest first, so each fraction can warm-start from the one above it
+SAMPLE_FRACTIONS = [100, 80, 50, 30, 15, 5, 1]
+
+def arima_file(sample_pct):
+    return "numeric_columns_hourly.parquet" if sample_pct == 100 else f"numeric_columns_hourly_{sample_pct}.parquet"
+
+def if_file(sample_pct):
+    return "IF_Ready_Data.parquet" if sample_pct == 100 else f"IF_Ready_Data_{sample_pct:02d}.parquet"
+
+def fidelity_scores(reference, candidate):
+    # Agreement with the full-data run on the anomaly timestamps
+    return {"true_positives": len(reference & candidate), **compare_anomaly_sets(reference, candidate)}
+
+def load_reference(loader, file_name):
+    # Every fraction is scored against the full data; a sample must never stand in for it
+    try:
+        return loader(file_name)
+    except Exception as e:
+        raise RuntimeError(f"Cannot load the full-data reference {file_name}; aborting the fidelity run") from e
+
+def load_log_series(file_name, metric):
+    df = pd.read_parquet(file_name, columns=["USAGE_DATE", "SESSION_HOUR", metric])
+    df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+    df = df.sort_values("datetime").set_index("datetime")
+    ts_raw = pd.to_numeric(df[metric], errors='coerce').dropna()
+    ts_log = np.log1p(ts_raw)
+    ts_log.name = f"LOG_{metric}"
+    return ts_log
+
+def arima_fidelity(metric, fractions=SAMPLE_FRACTIONS, warm_start=True, **detect_kwargs):
+    """
+    Runs the walk-forward ARIMA detector on every sample fraction and scores
+    each against the 100% run. With warm_start, every window of a fraction
+    starts its optimiser from the parameters fitted on the same window of the
+    next larger fraction, which cuts the iterations needed per fit. The run
+    aborts if the full-data file cannot be loaded.
+    """
+    from .ARIMApredictions import detect_anomalies
+
+    def run_fraction(sample_pct, ts_log, previous_params):
+        print(f"ARIMA {metric}: {sample_pct}% sample ({arima_file(sample_pct)})")
+        params = {}
+        with run_metrics.stage("arima_fraction", metric=metric, sample_pct=sample_pct):
+            anomalies, _, runtime = detect_anomalies(
+                ts_log, verbose=False, warm_start=previous_params if warm_start else None,
+                params_out=params, **detect_kwargs)
+        return {a["datetime"] for a in anomalies}, runtime, params
+
+    reference_log = load_reference(lambda file_name: load_log_series(file_name, metric), arima_file(100))
+    reference, runtime, previous_params = run_fraction(100, reference_log, None)
+    rows = [{
+        "detector": "ARIMA",
+        "metric": metric,
+        "sample_pct": 100,
+        "anomalies": len(reference),
+        "runtime": runtime,
+        **fidelity_scores(reference, reference),
+    }]
+    for sample_pct in sorted(set(fractions) - {100}, reverse=True):
+        file_name = arima_file(sample_pct)
+        try:
+            ts_log = load_log_series(file_name, metric)
+        except Exception as e:
+            print(f"Error loading {file_name}: {e}")
+            continue
+        times, runtime, previous_params = run_fraction(sample_pct, ts_log, previous_params)
+        rows.append({
+            "detector": "ARIMA",
+            "metric": metric,
+            "sample_pct": sample_pct,
+            "anomalies": len(times),
+            "runtime": runtime,
+            **fidelity_scores(reference, times),
+        })
+    return rows
+
+def isolation_forest_anomalies(file_name):
+    # Same preparation and model as IFapplied.process_dataset, without the reporting
+    from sklearn.ensemble import IsolationForest
+    from .IFapplied import compact_features, scaled_matrix
+
+    df = pd.read_parquet(file_name, engine="pyarrow")
+    keys = pd.to_datetime(df["USAGE_DATE"], errors="coerce") + pd.to_timedelta(df["SESSION_HOUR"], unit="h")
+    scaled = scaled_matrix(compact_features(df))
+    iso_forest = IsolationForest(random_state=42, contamination="auto")
+    labels = iso_forest.fit_predict(scaled)
+    return set(keys[labels == -1])
+
+def isolation_forest_fidelity(fractions=SAMPLE_FRACTIONS):
+
+    print(f"IsolationForest: 100% sample ({if_file(100)})")
+    start = time.time()
+    with run_metrics.stage("if_fraction", sample_pct=100):
+        reference = load_reference(isolation_forest_anomalies, if_file(100))
+    rows = [{
+        "detector": "IF",
+        "metric": "ALL",
+        "sample_pct": 100,
+        "anomalies": len(reference),
+        "runtime": time.time() - start,
+        **fidelity_scores(reference, reference),
+    }]
+    for sample_pct in sorted(set(fractions) - {100}, reverse=True):
+        file_name = if_file(sample_pct)
+        print(f"IsolationForest: {sample_pct}% sample ({file_name})")
+        start = time.time()
+        try:
+            with run_metrics.stage("if_fraction", sample_pct=sample_pct):
+                times = isolation_forest_anomalies(file_name)
+        except Exception as e:
+            print(f"Error processing {file_name}: {e}")
+            continue
+        runtime = time.time() - start
+        rows.append({
+            "detector": "IF",
+            "metric": "ALL",
+            "sample_pct": sample_pct,
+            "anomalies": len(times),
+            "runtime": runtime,
+            **fidelity_scores(reference, times),
+        })
+    return rows
+
+def main():
+    start = time.time()
+    run = run_metrics.start_run("fraction_fidelity")
+    rows = []
+    for metric in ["SUM_MB", "SUM_SESSIONS"]:
+        rows.extend(arima_fidelity(metric))
+    rows.extend(isolation_forest_fidelity())
+
+    curve = pd.DataFrame(rows)
+    curve["runtime_share"] = curve["runtime"] / curve.groupby(["detector", "metric"])["runtime"].transform("max")
+    print("\n=== Cost vs fidelity by sample fraction ===")
+    print(curve.to_string(index=False))
+
+    # Read by Cost_Benefit_Analysis_2.py in place of its hard-coded anomaly counts
+    output_file = "fraction_fidelity_curve.csv"
+    curve.to_csv(output_file, index=False)
+    print(f"Saved cost-versus-fidelity curve to {output_file}")
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+    run.finish()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import pandas as pd
+import numpy as np
+import glob
+import hashlib
+import json
+import os
+import time
+import pyarrow.parquet as pq
+from . import run_metrics
+from .category_recoding import build_features, load_dictionary
+
+HOUR_KEYS = ["USAGE_DATE", "SESSION_HOUR"]
+SUM_COLUMNS = ["SUM_MB", "SUM_SESSIONS"]
+
+def file_signature(path):
+    # Cheap change detection: size, modification time and the Parquet footer's row count
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "rows": pq.ParquetFile(path).metadata.num_rows}
+
+def partition_key(path):
+    # Manifest key and contribution name, the same however raw_dir is spelled
+    return os.path.normcase(os.path.abspath(path))
+
+def contribution_name(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] + ".parquet"
+
+def hour_keys(df):
+    return df["USAGE_DATE"].astype(str) + "|" + df["SESSION_HOUR"].astype(str)
+
+def dictionary_fingerprint(dictionary):
+    if dictionary is None:
+        return None
+    return hashlib.sha1(json.dumps(dictionary["columns"], sort_keys=True).encode("utf-8")).hexdigest()
+
+def load_manifest(store):
+    path = os.path.join(store, "manifest.json")
+    if not os.path.exists(path):
+        return {"dictionary": None, "files": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _replace_file(path, write):
+    # Writes to a temporary file first so a crash never leaves a half-written store
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+def save_manifest(manifest, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+def update_rollup(raw_dir, store="hourly_rollup", dictionary_file=None, pattern="*.parquet"):
+    """
+    Folds new, changed and removed raw partitions into the materialized hourly
+    rollup (SUM_MB, SUM_SESSIONS and, with a category dictionary, the category
+    counts) instead of re-running the GROUP BY USAGE_DATE, SESSION_HOUR over
+    everything.
+
+    The manifest records each raw file's signature and the hours it
+    contributes to, and each file's own hourly aggregate is kept under
+    contributions/. Only files whose signature changed are read. The hours
+    they touch now or touched before (late-arriving rows land in old hours)
+    are re-aggregated from the contributions of every file covering them;
+    all other hours of the rollup are left as they are. Files are keyed by
+    their absolute path.
+
+    Only the Parquet rollup is maintained here; the Snowflake tables built by
+    AGGREGATE_NUMERIC_SAMPLE_* are not.
+    """
+    start = time.time()
+    os.makedirs(os.path.join(store, "contributions"), exist_ok=True)
+    manifest = load_manifest(store)
+    rollup_file = os.path.join(store, "hourly.parquet")
+    dictionary = load_dictionary(dictionary_file) if dictionary_file else None
+    fingerprint = dictionary_fingerprint(dictionary)
+    if fingerprint != manifest["dictionary"] and manifest["files"]:
+        # Category columns are defined by the dictionary, so all contributions are stale
+        print("Category dictionary changed; rebuilding the rollup from every raw partition")
+        manifest = {"dictionary": fingerprint, "files": {}}
+        if os.path.exists(rollup_file):
+            os.remove(rollup_file)
+    manifest["dictionary"] = fingerprint
+
+    raw_files = {partition_key(path): path for path in glob.glob(os.path.join(raw_dir, pattern))}
+    changed = []
+    for key, path in sorted(raw_files.items()):
+        signature = file_signature(path)
+        entry = manifest["files"].get(key)
+        if entry is None or entry["signature"] != signature:
+            changed.append((key, path, signature))
+    removed = [key for key in manifest["files"] if key not in raw_files]
+    if not changed and not removed:
+        print(f"Hourly rollup in {store}/ is up to date ({len(raw_files)} raw partitions)")
+        return pd.read_parquet(rollup_file) if os.path.exists(rollup_file) else None
+
+    # Removals first, so a contribution rewritten below is never deleted afterwards
+    affected = set()
+    for key in removed:
+        old = manifest["files"].pop(key)
+        affected.update(old["hours"])
+        old_file = os.path.join(store, "contributions", old["contribution"])
+        if os.path.exists(old_file):
+            os.remove(old_file)
+    with run_metrics.stage("aggregate_partitions", files=len(changed)):
+        for key, path, signature in changed:
+            old = manifest["files"].get(key)
+            if old is not None:
+                affected.update(old["hours"])
+            name = contribution_name(key)
+            contribution = build_features(path, dictionary, os.path.join(store, "contributions", name))
+            hours = hour_keys(contribution).tolist()
+            affected.update(hours)
+            manifest["files"][key] = {"signature": signature, "contribution": name, "hours": hours}
+
+    with run_metrics.stage("reaggregate_hours", hours=len(affected)) as reaggregate_stats:
+        pieces = []
+        for entry in manifest["files"].values():
+            if affected.isdisjoint(entry["hours"]):
+                continue
+            contribution = pd.read_parquet(os.path.join(store, "contributions", entry["contribution"]))
+            pieces.append(contribution[hour_keys(contribution).isin(affected)])
+        reaggregate_stats["contributions"] = len(pieces)
+        if pieces:
+            refreshed = pd.concat(pieces, ignore_index=True).fillna(0).groupby(HOUR_KEYS, as_index=False).sum()
+        else:
+            refreshed = pd.DataFrame(columns=HOUR_KEYS + SUM_COLUMNS)
+
+        if os.path.exists(rollup_file):
+            rollup = pd.read_parquet(rollup_file)
+            rollup = rollup[~hour_keys(rollup).isin(affected)]
+            rollup = pd.concat([rollup, refreshed], ignore_index=True)
+        else:
+            rollup = refreshed
+        rollup = rollup.fillna(0).sort_values(HOUR_KEYS).reset_index(drop=True)
+        count_cols = [col for col in rollup.columns if col not in HOUR_KEYS + SUM_COLUMNS]
+        rollup[count_cols] = rollup[count_cols].astype(np.int64)
+
+    # Rollup first, then the manifest: after a crash in between the changed
+    # files are simply folded in again on the next run
+    _replace_file(rollup_file, lambda tmp: rollup.to_parquet(tmp, index=False, engine="pyarrow"))
+    _replace_file(os.path.join(store, "manifest.json"),
+                  lambda tmp: save_manifest(manifest, tmp))
+    print(f"Folded {len(changed)} new/changed and {len(removed)} removed raw partitions into {rollup_file}: "
+          f"{len(affected)} hours re-aggregated, {len(rollup)} hours in total ({time.time() - start:.2f} sec)")
+    return rollup
+
+def main(raw_dir="SAMPLE_DATA", store="hourly_rollup", dictionary_file=None):
+    run = run_metrics.start_run("hourly_rollup")
+    update_rollup(raw_dir, store, dictionary_file)
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
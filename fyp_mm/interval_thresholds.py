@@ -0,0 +1,73 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+
+# Alphas used across the ARIMA scripts: 99.73% (~3 sigma) in ARIMApredictions.py
+# and 0.0001 in ARIMA_LOG_TRANSFORM_VISUALS.py, plus some looser levels
+DEFAULT_ALPHAS = [0.05, 0.01, 0.0027, 0.001, 0.0001]
+
+def interval_zscores(forecast_results):
+    # Signed severity of each hour on the log scale, in forecast standard errors
+    return (forecast_results["actual_log"] - forecast_results["forecast_log"]) / forecast_results["se_log"]
+
+def sweep_thresholds(forecast_results, alphas=DEFAULT_ALPHAS):
+    """
+    Flags every forecast hour for every alpha at once from the stored forecast
+    mean and standard error of a single walk-forward run.
+
+    An hour is anomalous at level alpha when it falls outside the two-sided
+    (1 - alpha) normal interval on the log scale, which is the same test as
+    comparing the back-transformed actual with expm1 of conf_int(alpha).
+    Returns the per-hour flags (one column per alpha plus the severity z-score)
+    and a per-alpha summary of anomaly counts.
+    """
+    from scipy.stats import norm
+
+    alphas = np.asarray(alphas, dtype=float)
+    z = interval_zscores(forecast_results).to_numpy(dtype=float)
+    z_critical = norm.ppf(1 - alphas / 2)
+    flags = np.abs(z)[:, None] > z_critical[None, :]
+
+    flags_df = pd.DataFrame(flags, index=forecast_results.index,
+                            columns=[f"anomaly_alpha_{a:g}" for a in alphas])
+    flags_df.insert(0, "severity_z", z)
+    flags_df.insert(0, "datetime", forecast_results["datetime"].to_numpy())
+
+    counts_df = pd.DataFrame({
+        "alpha": alphas,
+        "confidence": 1 - alphas,
+        "z_critical": z_critical,
+        "anomalies": flags.sum(axis=0),
+        "anomaly_rate": flags.mean(axis=0) if len(z) else np.zeros(len(alphas)),
+    })
+    return flags_df, counts_df
+
+def main():
+    start = time.time()
+    forecast_file = sys.argv[1] if len(sys.argv) > 1 else "numeric_columns_hourly_forecast_results_SUM_MB"
+    forecast_file = forecast_file.rstrip("/\\")
+    if os.path.isdir(forecast_file):
+        # Day-partitioned dataset written by ARIMApredictions / ARIMA_LOG_TRANSFORM_VISUALS
+        from .partitioned_results import read_range
+        forecast_results = read_range(forecast_file)
+    else:
+        forecast_results = pd.read_parquet(forecast_file)
+    if "se_log" not in forecast_results.columns:
+        print(f"{forecast_file} has no se_log column; rerun the ARIMA script to store forecast standard errors.")
+        return
+
+    flags_df, counts_df = sweep_thresholds(forecast_results)
+    print(f"=== Threshold sweep for {forecast_file} ({len(forecast_results)} forecast hours) ===")
+    print(counts_df.to_string(index=False))
+
+    # numeric_columns_hourly_forecast_results_SUM_MB -> numeric_columns_hourly_SUM_MB_threshold_sweep.parquet
+    base_name = os.path.splitext(forecast_file)[0].replace("_forecast_results", "")
+    output_file = f"{base_name}_threshold_sweep.parquet"
+    flags_df.to_parquet(output_file)
+    print(f"Saved per-hour flags and severity z-scores to {output_file}")
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import sys
+import glob
+import time
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLUMN = "date"
+# Fingerprint of the input the dataset was written from; dataset readers skip "_" files
+FINGERPRINT_FILE = "_input_fingerprint"
+
+def _partition_dir(root, date):
+    return os.path.join(root, f"{PARTITION_COLUMN}={date}")
+
+def _new_part_path(partition_dir):
+    # Time-ordered names, so sorting the file names gives the write order
+    return os.path.join(partition_dir, f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+
+def existing_partitions(root):
+    prefix = f"{PARTITION_COLUMN}="
+    if not os.path.isdir(root):
+        return []
+    return sorted(name[len(prefix):] for name in os.listdir(root) if name.startswith(prefix))
+
+def _read_fingerprint(root):
+    path = os.path.join(root, FINGERPRINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip()
+
+def write_partitioned(df, root, time_col="datetime", mode="new", row_group_size=65536, fingerprint=None):
+    """
+    Writes results as a dataset partitioned by day (root/date=YYYY-MM-DD/part-*.parquet).
+
+    Rows inside each file are sorted by `time_col` so row-group statistics let
+    readers skip everything outside a requested time range.
+
+    mode="new" writes only days that are not on disk yet plus the latest day
+    already there, which a previous run may have left incomplete. This is the
+    daily-run mode, and it is only safe while earlier history does not change:
+    pass `fingerprint` (e.g. walk_forward_checkpoint.series_fingerprint of the
+    input and settings) and, when it differs from the one stored with the
+    dataset, every day is rewritten and days no longer in `df` are removed.
+    Without a fingerprint, old days are never revisited.
+    mode="replace" rewrites every day present in `df`, and mode="append" adds
+    a new part file to each day.
+    Returns the list of days written.
+    """
+    existing = existing_partitions(root)
+    times = pd.to_datetime(df[time_col]) if not df.empty else None
+    dates = set(times.dt.strftime("%Y-%m-%d")) if times is not None else set()
+    if mode == "new" and fingerprint is not None and existing and _read_fingerprint(root) != fingerprint:
+        print(f"Input of {root}/ changed since it was written; rewriting every day")
+        mode = "replace"
+        for date in set(existing) - dates:
+            for p in glob.glob(os.path.join(_partition_dir(root, date), "part-*.parquet")):
+                os.remove(p)
+            os.rmdir(_partition_dir(root, date))
+    latest = existing[-1] if existing else None
+    written = []
+    if times is None:
+        groups = []
+    else:
+        groups = df.assign(**{time_col: times}).groupby(times.dt.strftime("%Y-%m-%d").to_numpy(), sort=True)
+    for date, part in groups:
+        partition_dir = _partition_dir(root, date)
+        if mode == "new" and date in existing and date != latest:
+            continue
+        old_parts = glob.glob(os.path.join(partition_dir, "part-*.parquet")) if mode != "append" else []
+        os.makedirs(partition_dir, exist_ok=True)
+        table = pa.Table.from_pandas(part.sort_values(time_col), preserve_index=False)
+        pq.write_table(table, _new_part_path(partition_dir), row_group_size=row_group_size)
+        # Old parts go only once the new one is on disk
+        for p in old_parts:
+            os.remove(p)
+        written.append(date)
+    if fingerprint is not None:
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, FINGERPRINT_FILE), "w", encoding="utf-8") as f:
+            f.write(fingerprint)
+    return written
+
+def read_range(root, start=None, end=None, time_col="datetime", columns=None):
+    """
+    Reads rows with start <= time_col < end. Day partitions outside the range
+    are never opened and row groups inside a file are pruned on their
+    `time_col` statistics.
+    """
+    partitioning = ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive")
+    dataset = ds.dataset(root, format="parquet", partitioning=partitioning)
+    condition = None
+    if start is not None:
+        start = pd.Timestamp(start).to_pydatetime()
+        condition = (ds.field(PARTITION_COLUMN) >= start.strftime("%Y-%m-%d")) & (ds.field(time_col) >= start)
+    if end is not None:
+        end = pd.Timestamp(end).to_pydatetime()
+        end_condition = (ds.field(PARTITION_COLUMN) <= end.strftime("%Y-%m-%d")) & (ds.field(time_col) < end)
+        condition = end_condition if condition is None else condition & end_condition
+    if columns is not None and time_col not in columns:
+        columns = [time_col] + list(columns)
+    table = dataset.to_table(columns=columns, filter=condition)
+    df = table.to_pandas()
+    if PARTITION_COLUMN in df.columns:
+        df = df.drop(columns=PARTITION_COLUMN)
+    return df.sort_values(time_col).reset_index(drop=True)
+
+def compact(root, time_col="datetime", key_cols=None, row_group_size=65536):
+    """
+    Merges the part files of every day into one file sorted by `time_col`.
+
+    Rows repeated across appends (same `key_cols`, default the time column) keep
+    the most recently written version. The merged file is written before the
+    old parts are removed, so an interrupted compaction leaves duplicates behind
+    but never loses rows.
+    """
+    key_cols = key_cols or [time_col]
+    compacted = 0
+    for date in existing_partitions(root):
+        partition_dir = _partition_dir(root, date)
+        parts = sorted(glob.glob(os.path.join(partition_dir, "part-*.parquet")))
+        if len(parts) <= 1:
+            continue
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        if PARTITION_COLUMN in df.columns:
+            df = df.drop(columns=PARTITION_COLUMN)
+        df = df.drop_duplicates(subset=key_cols, keep="last").sort_values(time_col)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, _new_part_path(partition_dir), row_group_size=row_group_size)
+        for p in parts:
+            os.remove(p)
+        compacted += 1
+    return compacted
+
+def main():
+    # python -m fyp_mm compact <dataset root> [time column]: compact a dataset
+    root = sys.argv[1]
+    time_col = sys.argv[2] if len(sys.argv) > 2 else "datetime"
+    start = time.time()
+    compacted = compact(root, time_col)
+    print(f"Compacted {compacted} partitions of {root} in {time.time() - start:.2f} sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def peak_memory_mb():
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    # RUSAGE_CHILDREN covers the largest worker process already waited for
+    # (process pools are reaped at shutdown), so runs that do their work in
+    # workers don't report just the parent's footprint.
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class RunMetrics:
+    """
+    Records nested stage timings, counters and peak memory for one run and
+    writes them as JSON lines.
+
+    Every finished stage is appended to `metrics_file` straight away, so a run
+    that crashes still leaves its timings on disk. If `span_file` is given the
+    same stages are also written as OpenTelemetry-style spans (trace id, span id,
+    parent span id, start/end in unix nanoseconds) that can be loaded into a
+    trace viewer.
+    """
+
+    def __init__(self, run_name, metrics_file="run_metrics.jsonl", span_file=None):
+        self.run_name = run_name
+        self.run_id = uuid.uuid4().hex
+        self.metrics_file = metrics_file
+        self.span_file = span_file
+        self.counters = {}
+        self._stack = []
+        self._start = time.perf_counter()
+
+    def _write(self, path, record):
+        if path is None:
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        # Yields a dict so callers can attach results (iterations, row counts...)
+        parent = self._stack[-1] if self._stack else None
+        span = {
+            "name": name,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "path": f"{parent['path']}/{name}" if parent else name,
+            "attrs": dict(attrs),
+        }
+        self._stack.append(span)
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield span["attrs"]
+        except Exception as e:
+            status = "error"
+            span["attrs"]["error"] = repr(e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self._stack.pop()
+            self._write(self.metrics_file, {
+                "type": "stage",
+                "run": self.run_name,
+                "run_id": self.run_id,
+                "stage": span["path"],
+                "depth": len(self._stack),
+                "duration_sec": round(duration, 6),
+                "status": status,
+                **span["attrs"],
+            })
+            self._write(self.span_file, {
+                "traceId": self.run_id,
+                "spanId": span["span_id"],
+                "parentSpanId": span["parent_id"],
+                "name": name,
+                "startTimeUnixNano": start_ns,
+                "endTimeUnixNano": start_ns + int(duration * 1e9),
+                "status": status,
+                "attributes": {"run": self.run_name, **span["attrs"]},
+            })
+
+    def increment(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record(self, event, **fields):
+        self._write(self.metrics_file, {
+            "type": "event",
+            "run": self.run_name,
+            "run_id": self.run_id,
+            "event": event,
+            "stage": self._stack[-1]["path"] if self._stack else None,
+            **fields,
+        })
+
+    def finish(self):
+        summary = {
+            "type": "summary",
+            "run": self.run_name,
+            "run_id": self.run_id,
+            "total_sec": round(time.perf_counter() - self._start, 6),
+            "peak_memory_mb": peak_memory_mb(),
+            **self.counters,
+        }
+        self._write(self.metrics_file, summary)
+        return summary
+
+
+# A run that records nothing, used when a function is called outside start_run()
+_current = RunMetrics("untracked", metrics_file=None)
+
+
+def start_run(run_name, metrics_file=None, span_file=None):
+    global _current
+    if metrics_file is None:
+        metrics_file = os.environ.get("FYP_METRICS_FILE", "run_metrics.jsonl")
+    if span_file is None:
+        span_file = os.environ.get("FYP_SPAN_FILE")
+    _current = RunMetrics(run_name, metrics_file=metrics_file, span_file=span_file)
+    return _current
+
+
+def current_run():
+    return _current
+
+
+def stage(name, **attrs):
+    return _current.stage(name, **attrs)
+
+
+def summarize_stages(metrics_file="run_metrics.jsonl", run_id=None):
+    # Total time, call count and max per stage path for one run (the last one by default)
+    records = []
+    with open(metrics_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    if run_id is None and records:
+        run_id = records[-1]["run_id"]
+    totals = {}
+    for rec in records:
+        if rec.get("type") != "stage" or rec["run_id"] != run_id:
+            continue
+        entry = totals.setdefault(rec["stage"], {"stage": rec["stage"], "calls": 0, "total_sec": 0.0, "max_sec": 0.0})
+        entry["calls"] += 1
+        entry["total_sec"] += rec["duration_sec"]
+        entry["max_sec"] = max(entry["max_sec"], rec["duration_sec"])
+    return sorted(totals.values(), key=lambda e: e["total_sec"], reverse=True)
+
+
+def main():
+    metrics_file = sys.argv[1] if len(sys.argv) > 1 else "run_metrics.jsonl"
+    print(f"Stage timings from {metrics_file} (slowest first):")
+    for entry in summarize_stages(metrics_file):
+        print(f"{entry['stage']:<50} calls={entry['calls']:<6} total={entry['total_sec']:.2f}s max={entry['max_sec']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,368 @@
+import pandas as pd
+import numpy as np
+import json
+import queue
+import threading
+import time
+import warnings
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import error as urlerror
+from urllib import request as urlrequest
+from . import run_metrics
+from .IFapplied import compact_features
+
+warnings.filterwarnings("ignore")
+
+# Metric -> interval alpha, as in ARIMApredictions.py (SUM_MB) and
+# ARIMA_LOG_TRANSFORM_VISUALS.py (SUM_SESSIONS)
+ARIMA_ALPHAS = {"SUM_MB": 0.0027, "SUM_SESSIONS": 0.0001}
+
+class SeasonalForecaster:
+    """
+    One fitted ARIMA(1,0,0)(1,0,2)[24] on log1p of a metric, kept in memory.
+
+    The forecasts and intervals for the next `horizon` hours after the last
+    observed hour are computed once per state change and held in a table, so
+    scoring a record is a lookup. observe() only queues new actuals: an
+    updater thread folds them into the state with the fitted parameters
+    (results.extend, no refit; hours skipped over are passed as missing),
+    builds the next table and then swaps it in, so scoring never waits for it.
+    """
+    def __init__(self, ts_log, alpha, horizon=48):
+        from statsmodels.tsa.arima.model import ARIMA
+
+        ts_log = ts_log.asfreq("h")
+        self.alpha = alpha
+        self.horizon = horizon
+        self.results = ARIMA(ts_log, order=(1, 0, 0), seasonal_order=(1, 0, 2, 24)).fit()
+        self.last_observed = ts_log.index[-1]
+        self.table = self._forecast_table(self.results, self.last_observed)
+        self.updates = queue.Queue()
+        threading.Thread(target=self._run_updates, daemon=True).start()
+
+    def _forecast_table(self, results, last_observed):
+        forecast_obj = results.get_forecast(steps=self.horizon)
+        conf_int = np.asarray(forecast_obj.conf_int(alpha=self.alpha))
+        index = pd.date_range(last_observed + pd.Timedelta(hours=1), periods=self.horizon, freq="h")
+        return pd.DataFrame({
+            "forecast": np.expm1(np.asarray(forecast_obj.predicted_mean)),
+            "lower": np.expm1(conf_int[:, 0]),
+            "upper": np.expm1(conf_int[:, 1]),
+        }, index=index)
+
+    def score(self, datetimes, actuals):
+        # Vectorised lookup of every record's hour in the forecast table
+        rows = self.table.reindex(pd.DatetimeIndex(datetimes))
+        scored = rows.assign(actual=np.asarray(actuals, dtype=float))
+        scored["anomaly"] = (scored["actual"] < scored["lower"]) | (scored["actual"] > scored["upper"])
+        return scored
+
+    def observe(self, datetimes, actuals):
+        self.updates.put(pd.Series(np.asarray(actuals, dtype=float), index=pd.DatetimeIndex(datetimes)))
+
+    def _run_updates(self):
+        while True:
+            # Everything queued meanwhile is folded in with a single extend
+            pending = [self.updates.get()]
+            while True:
+                try:
+                    pending.append(self.updates.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._advance(pd.concat(pending))
+            except Exception as e:
+                print(f"Error advancing the forecast state: {e}")
+            finally:
+                for _ in pending:
+                    self.updates.task_done()
+
+    def _advance(self, new):
+        # Only hours after the last observed one can advance the state. Hours
+        # past the current horizon (e.g. after an ingest outage) are folded in
+        # too, with the gap passed as missing; returns how many hours were folded in
+        new = new[new.index > self.last_observed]
+        if new.empty:
+            return 0
+        new = new.groupby(level=0).last()
+        hours = pd.date_range(self.last_observed + pd.Timedelta(hours=1), new.index[-1], freq="h")
+        results = self.results.extend(np.log1p(new.reindex(hours)))
+        table = self._forecast_table(results, hours[-1])
+        # The table goes last: until then requests are scored against the previous one
+        self.results = results
+        self.last_observed = hours[-1]
+        self.table = table
+        return len(new)
+
+class IsolationForestScorer:
+    # The IsolationForest and scaler from IF_Ready_Data, applied to feature records
+    def __init__(self, df):
+        from sklearn.ensemble import IsolationForest
+        from sklearn.preprocessing import StandardScaler
+
+        df = compact_features(df)
+        self.feature_names = list(df.columns)
+        X = df.to_numpy(dtype=np.float32)
+        self.scaler = StandardScaler().fit(X)
+        self.forest = IsolationForest(random_state=42, contamination="auto").fit(self.scaler.transform(X))
+
+    def score(self, feature_rows):
+        df = pd.DataFrame(feature_rows).reindex(columns=self.feature_names, fill_value=0)
+        X = self.scaler.transform(compact_features(df).to_numpy(dtype=np.float32))
+        return self.forest.decision_function(X), self.forest.predict(X) == -1
+
+class Scorer:
+    """
+    Scores a micro-batch of records with every model in one pass.
+
+    A record is a dict with "datetime", any of the ARIMA metrics (SUM_MB,
+    SUM_SESSIONS), optionally "features" (an IF_Ready_Data row) and
+    "observe" (default true). All records are scored against the current
+    forecasts; records with observe set are then queued to advance the ARIMA
+    state, which later batches see once the new forecast table is swapped in.
+    """
+    def __init__(self, forecasters, iforest=None):
+        self.forecasters = forecasters
+        self.iforest = iforest
+
+    def score_batch(self, records):
+        results = [{"datetime": record.get("datetime")} for record in records]
+        datetimes = pd.to_datetime([record.get("datetime") for record in records], errors="coerce")
+        for metric, forecaster in self.forecasters.items():
+            positions = [i for i, record in enumerate(records) if record.get(metric) is not None]
+            if not positions:
+                continue
+            actuals = [records[i][metric] for i in positions]
+            scored = forecaster.score(datetimes[positions], actuals)
+            for i, row in zip(positions, scored.itertuples(index=False)):
+                if np.isnan(row.forecast):
+                    results[i][metric] = {"error": "outside the current forecast horizon"}
+                else:
+                    results[i][metric] = {"actual": row.actual, "forecast": row.forecast, "lower": row.lower,
+                                          "upper": row.upper, "anomaly": bool(row.anomaly)}
+            observed = [i for i in positions if records[i].get("observe", True)]
+            if observed:
+                forecaster.observe(datetimes[observed], [records[i][metric] for i in observed])
+
+        positions = [i for i, record in enumerate(records) if record.get("features")]
+        if self.iforest is not None and positions:
+            scores, flags = self.iforest.score([records[i]["features"] for i in positions])
+            for i, score, flag in zip(positions, scores, flags):
+                results[i]["iforest"] = {"score": float(score), "anomaly": bool(flag)}
+        return results
+
+    def status(self):
+        return {
+            "arima": {metric: {"last_observed": str(f.last_observed),
+                               "horizon_start": str(f.table.index[0]),
+                               "horizon_end": str(f.table.index[-1]),
+                               "pending_updates": f.updates.qsize()}
+                      for metric, f in self.forecasters.items()},
+            "iforest_features": self.iforest.feature_names if self.iforest is not None else None,
+        }
+
+class MicroBatcher:
+    """
+    Collects records from concurrent requests and scores them together.
+
+    A background thread takes the first waiting request, then keeps adding
+    requests until `max_batch` records are queued or `max_wait` seconds have
+    passed, and scores them with one score_batch call. Each request gets its
+    own slice of the results through a Future, and gives up with a
+    TimeoutError after `timeout` seconds.
+    """
+    def __init__(self, score_batch, max_batch=256, max_wait=0.002, timeout=5.0):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.batches = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, records):
+        future = Future()
+        self.queue.put((records, future))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Still queued: the batcher skips it. Already being scored: the result is dropped
+            future.cancel()
+            raise
+
+    def _run(self):
+        while True:
+            pending = [self.queue.get()]
+            size = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+            # Requests that timed out while queued were cancelled
+            pending = [(batch, future) for batch, future in pending if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            records = [record for batch, _ in pending for record in batch]
+            try:
+                results = self.score_batch(records)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            offset = 0
+            for batch, future in pending:
+                future.set_result(results[offset:offset + len(batch)])
+                offset += len(batch)
+
+def make_handler(batcher, scorer):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, code, body):
+            payload = json.dumps(body, default=str).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(200, {**scorer.status(), "batches": batcher.batches})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/score":
+                self._reply(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except ValueError as e:
+                self._reply(400, {"error": f"invalid JSON: {e}"})
+                return
+            records = body if isinstance(body, list) else [body]
+            try:
+                self._reply(200, batcher.submit(records))
+            except FutureTimeoutError:
+                self._reply(503, {"error": f"scoring did not finish within {batcher.timeout} sec"})
+            except Exception as e:
+                self._reply(500, {"error": repr(e)})
+
+        def log_message(self, format, *args):
+            # Per-request logging to stderr costs more than scoring a record
+            pass
+
+    return Handler
+
+def build_scorer(hourly_file="numeric_columns_hourly.parquet", if_file="IF_Ready_Data.parquet",
+                 train_hours=24 * 28, horizon=48):
+    # Fits every model once at startup on the last `train_hours` of history
+    df = pd.read_parquet(hourly_file)
+    df["datetime"] = pd.to_datetime(df["USAGE_DATE"], errors="coerce") + pd.to_timedelta(df["SESSION_HOUR"], unit="h")
+    df = df.sort_values("datetime").set_index("datetime")
+    forecasters = {}
+    for metric, alpha in ARIMA_ALPHAS.items():
+        with run_metrics.stage("fit_arima", metric=metric):
+            ts_log = np.log1p(pd.to_numeric(df[metric], errors="coerce").dropna()).iloc[-train_hours:]
+            forecasters[metric] = SeasonalForecaster(ts_log, alpha, horizon)
+        print(f"{metric}: fitted on {len(ts_log)} hours, forecasting up to {forecasters[metric].table.index[-1]}")
+    iforest = None
+    if if_file:
+        with run_metrics.stage("fit_iforest", file=if_file):
+            iforest = IsolationForestScorer(pd.read_parquet(if_file, engine="pyarrow"))
+        print(f"IsolationForest: fitted on {if_file} ({len(iforest.feature_names)} features)")
+    return Scorer(forecasters, iforest)
+
+def serve(host="127.0.0.1", port=8765, max_batch=256, max_wait=0.002, timeout=5.0, **scorer_kwargs):
+    start = time.time()
+    run = run_metrics.start_run("scoring_service")
+    scorer = build_scorer(**scorer_kwargs)
+    batcher = MicroBatcher(scorer.score_batch, max_batch, max_wait, timeout)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, scorer))
+    print(f"Models ready in {time.time() - start:.2f} sec; serving on http://{host}:{port} (POST /score, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        run.finish()
+
+def _post(url, records):
+    data = json.dumps(records).encode("utf-8")
+    req = urlrequest.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urlrequest.urlopen(req) as response:
+        return json.loads(response.read())
+
+def load_test(base_url="http://127.0.0.1:8765", requests=2000, concurrency=16, records_per_request=1, seed=0):
+    """
+    Fires `requests` score requests from `concurrency` client threads and
+    reports throughput and latency percentiles. Records fall inside the
+    current forecast horizon and are sent with observe=false, so the test
+    does not move the service's ARIMA state.
+    """
+    with urlrequest.urlopen(f"{base_url}/health") as response:
+        status = json.loads(response.read())
+    rng = np.random.default_rng(seed)
+    horizons = {metric: pd.date_range(s["horizon_start"], s["horizon_end"], freq="h")
+                for metric, s in status["arima"].items()}
+    hours = next(iter(horizons.values()))
+    features = status["iforest_features"] or []
+
+    def make_records():
+        records = []
+        for _ in range(records_per_request):
+            hour = hours[rng.integers(len(hours))]
+            record = {"datetime": str(hour), "observe": False}
+            for metric in horizons:
+                record[metric] = float(rng.lognormal(5, 1))
+            if features:
+                record["features"] = {name: int(rng.integers(0, 3)) for name in features}
+                record["features"].update({"USAGE_DATE": str(hour.date()), "SESSION_HOUR": hour.hour})
+            records.append(record)
+        return records
+
+    payloads = [make_records() for _ in range(requests)]
+    url = f"{base_url}/score"
+
+    def timed(records):
+        # A saturated service answers 503; count it instead of aborting the test
+        start = time.perf_counter()
+        try:
+            _post(url, records)
+            failed = False
+        except (urlerror.HTTPError, urlerror.URLError):
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, payloads))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([latency for latency, _ in outcomes])
+    errors = sum(failed for _, failed in outcomes)
+
+    records_sent = requests * records_per_request
+    print(f"{requests} requests ({records_sent} records) from {concurrency} clients in {elapsed:.2f} sec")
+    print(f"Throughput: {requests / elapsed:.1f} requests/sec, {records_sent / elapsed:.1f} records/sec, "
+          f"errors: {errors} ({errors / requests:.1%})")
+    print(f"Latency: p50 {np.percentile(latencies, 50) * 1000:.1f} ms, p99 {np.percentile(latencies, 99) * 1000:.1f} ms, "
+          f"max {latencies.max() * 1000:.1f} ms")
+    return latencies
+
+def main(mode="serve", **kwargs):
+    if mode == "loadtest":
+        load_test(**kwargs)
+    else:
+        serve(**kwargs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import pandas as pd
+import numpy as np
+import time
+import warnings
+from numpy.lib.stride_tricks import sliding_window_view
+
+warnings.filterwarnings("ignore")
+
+def seasonal_robust_zscores(ts_log, period=24, window_days=7, min_scale=1e-3):
+    """
+    Robust z-score of every point against a seasonal median baseline.
+
+    The hourly series is laid out as a days x 24 array so that each column is
+    one hour of the day. For every cell the baseline is the median of the same
+    hour over the previous `window_days` days (trailing, so a window is never
+    judged on later data) and the spread is the MAD of those values, all
+    computed for the whole series in one NumPy pass. Points with no earlier
+    value for their hour get NaN.
+    """
+    values = np.asarray(ts_log, dtype=float)
+    if isinstance(ts_log.index, pd.DatetimeIndex) and period == 24:
+        # Place each point by its timestamp, so hours missing from the series
+        # leave gaps instead of shifting later points into the wrong hour column
+        first_day = ts_log.index[0].normalize()
+        positions = np.asarray((ts_log.index - first_day) // pd.Timedelta(hours=1), dtype=np.int64)
+    else:
+        positions = np.arange(len(values))
+    n_days = -(-(positions[-1] + 1) // period) if len(values) else 0
+    grid = np.full(n_days * period, np.nan)
+    grid[positions] = values
+    grid = grid.reshape(n_days, period)
+
+    padded = np.pad(grid, ((window_days, 0), (0, 0)), constant_values=np.nan)
+    # Window d covers days d - window_days .. d - 1
+    windows = sliding_window_view(padded, window_days, axis=0)[:n_days]  # (n_days, period, window_days)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        baseline = np.nanmedian(windows, axis=-1)
+        mad = np.nanmedian(np.abs(windows - baseline[..., None]), axis=-1)
+    scale = np.maximum(1.4826 * np.nan_to_num(mad), min_scale)
+    z = ((grid - baseline) / scale).reshape(-1)[positions]
+    return pd.Series(z, index=ts_log.index, name="seasonal_z")
+
+def candidate_windows(ts_log, initial_train=120, forecast_horizon=48, threshold=2.5, period=24, window_days=7):
+    """
+    Boolean flag per walk-forward window (same windows as detect_anomalies):
+    True when the window holds at least one point whose seasonal robust z-score
+    exceeds `threshold`, or that has no baseline yet, and so needs the ARIMA
+    confirmation step.
+    """
+    z = np.abs(seasonal_robust_zscores(ts_log, period, window_days).to_numpy())
+    n_windows = max((len(z) - initial_train) // forecast_horizon, 0)
+    tested = z[initial_train:initial_train + n_windows * forecast_horizon]
+    return ~(tested.reshape(n_windows, forecast_horizon) <= threshold).all(axis=1)
+
+def evaluate_prefilter(ts_log, threshold=2.5, initial_train=120, forecast_horizon=48, **detect_kwargs):
+    """
+    Runs detect_anomalies with and without the pre-filter and reports the
+    fraction of windows skipped, the runtime of each mode and the recall of
+    the pre-filtered run against the full ARIMA run.
+    """
+    from .ARIMApredictions import detect_anomalies
+
+    full_anomalies, _, full_runtime = detect_anomalies(
+        ts_log, initial_train, forecast_horizon, verbose=False, **detect_kwargs)
+    filtered_anomalies, _, filtered_runtime = detect_anomalies(
+        ts_log, initial_train, forecast_horizon, verbose=False, prefilter_threshold=threshold, **detect_kwargs)
+
+    mask = candidate_windows(ts_log, initial_train, forecast_horizon, threshold)
+    full_times = {a["datetime"] for a in full_anomalies}
+    filtered_times = {a["datetime"] for a in filtered_anomalies}
+    recall = len(full_times & filtered_times) / len(full_times) if full_times else 1.0
+    return {
+        "threshold": threshold,
+        "windows": len(mask),
+        "windows_skipped": int((~mask).sum()),
+        "skipped_fraction": float((~mask).mean()) if len(mask) else 0.0,
+        "full_anomalies": len(full_times),
+        "filtered_anomalies": len(filtered_times),
+        "recall": recall,
+        "missed": sorted(full_times - filtered_times),
+        "full_runtime": full_runtime,
+        "filtered_runtime": filtered_runtime,
+    }
+
+def main():
+    start = time.time()
+    df = pd.read_parquet("numeric_columns_hourly.parquet")
+    df['datetime'] = pd.to_datetime(df['USAGE_DATE'], errors='coerce') + pd.to_timedelta(df['SESSION_HOUR'], unit='h')
+    df = df.sort_values("datetime").set_index("datetime")
+
+    results = []
+    for metric in ["SUM_MB", "SUM_SESSIONS"]:
+        ts_raw = pd.to_numeric(df[metric], errors='coerce').dropna()
+        ts_log = np.log1p(ts_raw)
+        ts_log.name = f"LOG_{metric}"
+        result = evaluate_prefilter(ts_log)
+        result["metric"] = metric
+        results.append(result)
+        print(f"\n{metric}: skipped {result['windows_skipped']}/{result['windows']} windows "
+              f"({result['skipped_fraction']:.1%}), recall vs full ARIMA {result['recall']:.1%}")
+        print(f"Runtime full: {result['full_runtime']:.2f} sec, pre-filtered: {result['filtered_runtime']:.2f} sec")
+        if result["missed"]:
+            print("Anomalies missed by the pre-filter:", result["missed"])
+
+    summary_df = pd.DataFrame(results).drop(columns="missed")
+    print("\n=== Pre-filter summary ===")
+    print(summary_df)
+    print(f"Total execution time: {time.time() - start:.2f} sec")
+
+if __name__ == "__main__":
+    main()
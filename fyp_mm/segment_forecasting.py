@@ -0,0 +1,196 @@
+import pandas as pd
+import numpy as np
+import time
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import run_metrics
+from .category_recoding import load_dictionary, recode
+
+warnings.filterwarnings("ignore")
+
+SEGMENT_COLUMNS = ["COUNTRY", "OPERATOR", "SERVINGNETWORK", "RAT", "APN"]
+
+# Hourly metric name -> raw SAMPLE_DATA column it is summed from (see agg for arima.sql)
+METRIC_SOURCES = {
+    "SUM_MB": "TOTAL_MB_CHARGED",
+    "SUM_SESSIONS": "TOTAL_SESSIONS",
+}
+
+def build_segment_series(df, metric="SUM_MB", segment_cols=SEGMENT_COLUMNS, dictionary=None):
+    """
+    Aggregates raw usage rows into one hourly series per segment.
+
+    Returns a Series indexed by (segment columns..., datetime), the per-segment
+    equivalent of the fleet-wide GROUP BY USAGE_DATE, SESSION_HOUR. With a
+    category dictionary (see category_recoding.py), infrequent values of the
+    segment columns it covers are recoded to 'Other' first.
+    """
+    df = df[df["SESSION_HOUR"] != -1]
+    if dictionary is not None:
+        df = recode(df.copy(), dictionary, [col for col in segment_cols if col in dictionary["columns"]])
+    datetime = pd.to_datetime(df["USAGE_DATE"], errors="coerce") + pd.to_timedelta(df["SESSION_HOUR"], unit="h")
+    values = pd.to_numeric(df[METRIC_SOURCES[metric]], errors="coerce")
+    keys = [df[col].fillna("-1").astype(str) for col in segment_cols] + [datetime.rename("datetime")]
+    hourly = values.groupby(keys, sort=True).sum()
+    hourly.name = metric
+    return hourly
+
+def pool_sparse_segments(hourly, segment_cols=SEGMENT_COLUMNS, min_hours=24 * 14, sparse_mode="pool"):
+    """
+    Segments with fewer than `min_hours` active hours cannot support a seasonal
+    fit. With sparse_mode="pool" they are summed into a single 'Other' segment
+    (the same bucket name the SQL recoding uses), with "skip" they are dropped.
+    """
+    active_hours = hourly.groupby(level=segment_cols).size()
+    sparse_keys = active_hours[active_hours < min_hours].index
+    if len(sparse_keys) == 0:
+        return hourly, 0
+    is_sparse = hourly.index.droplevel("datetime").isin(sparse_keys)
+    dense = hourly[~is_sparse]
+    if sparse_mode == "skip":
+        return dense, len(sparse_keys)
+    pooled = hourly[is_sparse].groupby(level="datetime").sum()
+    pooled.index = pd.MultiIndex.from_tuples(
+        [tuple(["Other"] * len(segment_cols)) + (dt,) for dt in pooled.index],
+        names=list(segment_cols) + ["datetime"])
+    return pd.concat([dense, pooled]).groupby(level=list(segment_cols) + ["datetime"]).sum(), len(sparse_keys)
+
+def iter_segment_tasks(hourly, segment_cols=SEGMENT_COLUMNS, history_hours=None):
+    # Hours with no rows are zero usage, so every series is put on a regular hourly grid
+    if hourly.empty:
+        # Nothing left after pooling/skipping sparse segments
+        return
+    full_range = pd.date_range(hourly.index.get_level_values("datetime").min(),
+                               hourly.index.get_level_values("datetime").max(), freq="h")
+    if history_hours is not None:
+        full_range = full_range[-history_hours:]
+    for key, series in hourly.groupby(level=segment_cols, sort=False):
+        series = series.droplevel(segment_cols).reindex(full_range, fill_value=0)
+        yield key, series
+
+def _detect_batch(batch, detect_kwargs):
+    # Runs in a worker process; the ARIMA module is imported here so the parent
+    # does not pay for statsmodels until work is actually dispatched.
+    from .ARIMApredictions import detect_anomalies
+    run = run_metrics.current_run()
+    horizon = detect_kwargs.get("forecast_horizon", 48)
+    results = []
+    for key, series in batch:
+        start = time.time()
+        ts_log = np.log1p(series.astype(float))
+        fit_errors = run.counters.get("fit_errors", 0)
+        try:
+            anomalies, forecast_results, _ = detect_anomalies(ts_log, verbose=False, **detect_kwargs)
+            error = None
+            # detect_anomalies stops the walk-forward at the first failed fit
+            # instead of raising, so a cut-short segment is reported here
+            if run.counters.get("fit_errors", 0) > fit_errors:
+                error = f"fit failed; walk-forward stopped after {len(forecast_results) // horizon} forecast windows"
+        except Exception as e:
+            anomalies, error = [], repr(e)
+        results.append({
+            "segment": key,
+            "anomalies": anomalies,
+            "points": len(series),
+            "runtime": time.time() - start,
+            "error": error,
+        })
+    return results
+
+def detect_segment_anomalies(hourly, segment_cols=SEGMENT_COLUMNS, history_hours=None,
+                             max_workers=None, batch_size=16, **detect_kwargs):
+    """
+    Runs the seasonal ARIMA detector on every segment series across a process
+    pool and returns one combined anomaly table plus a per-segment summary.
+
+    Series are shipped to workers in batches of `batch_size` so that pickling
+    and task overhead is paid per batch rather than per series.
+    """
+    run = run_metrics.current_run()
+    batches = []
+    batch = []
+    for task in iter_segment_tasks(hourly, segment_cols, history_hours):
+        batch.append(task)
+        if len(batch) == batch_size:
+            batches.append(batch)
+            batch = []
+    if batch:
+        batches.append(batch)
+
+    anomaly_rows = []
+    summary_rows = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_detect_batch, b, detect_kwargs) for b in batches]
+        for done, future in enumerate(as_completed(futures), start=1):
+            for result in future.result():
+                segment = dict(zip(segment_cols, result["segment"]))
+                for anomaly in result["anomalies"]:
+                    anomaly_rows.append({**segment, **anomaly})
+                summary_rows.append({
+                    **segment,
+                    "points": result["points"],
+                    "anomaly_count": len(result["anomalies"]),
+                    "runtime": result["runtime"],
+                    "error": result["error"],
+                })
+                run.increment("segments")
+            print(f"Completed batch {done}/{len(batches)}")
+
+    anomalies_df = pd.DataFrame(anomaly_rows, columns=list(segment_cols) + [
+        "entry", "datetime", "actual", "forecast", "lower_bound", "upper_bound"])
+    summary_df = pd.DataFrame(summary_rows)
+    return anomalies_df, summary_df
+
+def process_raw_file(file_name, metric="SUM_MB", segment_cols=SEGMENT_COLUMNS, min_hours=24 * 14,
+                     sparse_mode="pool", history_hours=24 * 28, max_workers=None, batch_size=16,
+                     dictionary_file=None):
+
+    print(f"\n=== Segment-level detection: {file_name} ({metric} by {', '.join(segment_cols)}) ===")
+    start = time.time()
+    columns = ["USAGE_DATE", "SESSION_HOUR", METRIC_SOURCES[metric]] + list(segment_cols)
+    with run_metrics.stage("load", file=file_name) as load_stats:
+        df = pd.read_parquet(file_name, columns=columns)
+        load_stats["rows"] = len(df)
+
+    with run_metrics.stage("build_segments") as segment_stats:
+        dictionary = load_dictionary(dictionary_file) if dictionary_file else None
+        hourly = build_segment_series(df, metric, segment_cols, dictionary)
+        del df
+        hourly, sparse_count = pool_sparse_segments(hourly, segment_cols, min_hours, sparse_mode)
+        segment_stats["sparse_segments"] = sparse_count
+    print(f"{sparse_count} sparse segments ({'pooled into Other' if sparse_mode == 'pool' else 'skipped'})")
+
+    with run_metrics.stage("detect_anomalies") as detect_stats:
+        anomalies_df, summary_df = detect_segment_anomalies(
+            hourly, segment_cols, history_hours, max_workers, batch_size)
+        detect_stats["segments"] = len(summary_df)
+        detect_stats["anomalies"] = len(anomalies_df)
+    runtime = time.time() - start
+    print(f"Modelled {len(summary_df)} segments, detected {len(anomalies_df)} anomalies in {runtime:.2f} sec.")
+
+    base_name = os.path.splitext(file_name)[0]
+    anomalies_file = f"{base_name}_segment_anomalies_{metric}.parquet"
+    summary_file = f"{base_name}_segment_summary_{metric}.parquet"
+    with run_metrics.stage("write_parquet"):
+        anomalies_df.to_parquet(anomalies_file, index=False)
+        summary_df.to_parquet(summary_file, index=False)
+    print(f"Saved segment anomalies to {anomalies_file} and per-segment summary to {summary_file}")
+
+    failed = summary_df[summary_df["error"].notna()] if not summary_df.empty else summary_df
+    if not failed.empty:
+        print(f"{len(failed)} segments failed to fit or were cut short:")
+        print(failed[list(segment_cols) + ["error"]].head(20))
+
+    return anomalies_df, summary_df
+
+def main():
+    run = run_metrics.start_run("segment_arima")
+    for metric in ["SUM_MB", "SUM_SESSIONS"]:
+        with run_metrics.stage("process_file", metric=metric):
+            process_raw_file("SAMPLE_DATA.parquet", metric=metric)
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Subcommands that only read small result files should be ready to work in
+# well under a second; the others are timed for reference
+BUDGETS = {"overlap": 1.0, "cost": 1.0}
+COMMANDS = [
+    ["overlap"],
+    ["overlap", "--pair", "if-arima"],
+    ["cost", "--no-plot"],
+    ["profile"],
+    ["prep"],
+    ["arima"],
+    ["tune"],
+    ["iforest"],
+]
+
+# Runs in a fresh interpreter: parse the command line and import the module
+# behind it (everything up to calling its main()), then report which heavy
+# libraries were loaded on the way
+PROBE = (
+    "import json, sys\n"
+    "from fyp_mm import cli\n"
+    "cli.resolve(sys.argv[1:])\n"
+    "print(json.dumps(sorted(m for m in cli.HEAVY_MODULES if m in sys.modules)))\n"
+)
+
+def time_startup(args, repeats=5):
+    """
+    Median wall time, over `repeats` fresh interpreters, from process launch
+    until the subcommand is ready to run. Returns (seconds, heavy modules
+    loaded, error message or None).
+    """
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    loaded, error = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", PROBE] + args, cwd=package_parent,
+                                capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            break
+        loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return statistics.median(timings), loaded, error
+
+def time_startup_bare(repeats=5):
+    # Interpreter startup alone, for reference
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main(repeats=5):
+    baseline = time_startup_bare(repeats)
+    print(f"Bare interpreter startup: {baseline:.3f} sec")
+    print(f"{'command':<32} {'startup':>8} {'budget':>7}  heavy imports")
+    failed = []
+    for args in COMMANDS:
+        seconds, loaded, error = time_startup(args, repeats)
+        budget = BUDGETS.get(args[0])
+        label = " ".join(args)
+        budget_text = f"{budget:.1f}s" if budget is not None else "-"
+        detail = f"ERROR: {error}" if error else (", ".join(loaded) or "none")
+        print(f"{label:<32} {seconds:>7.3f}s {budget_text:>7}  {detail}")
+        if budget is not None and (error or seconds > budget):
+            failed.append(label)
+    if failed:
+        print(f"Over the startup budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("All budgeted subcommands start within budget.")
+
+if __name__ == "__main__":
+    main()
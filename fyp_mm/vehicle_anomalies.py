@@ -0,0 +1,178 @@
+import pandas as pd
+import numpy as np
+import time
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pyarrow as pa
+import pyarrow.parquet as pq
+from . import run_metrics
+from .segment_forecasting import METRIC_SOURCES
+
+VEHICLE_COLUMN = "VEHICLE_ID"
+VALUE_COLUMNS = list(METRIC_SOURCES.values())
+RAW_COLUMNS = ["USAGE_DATE", "SESSION_HOUR", VEHICLE_COLUMN, "ECUTYPE"] + VALUE_COLUMNS
+
+def vehicle_partition(vehicle_ids, n_partitions):
+    # hash_pandas_object is stable across processes and runs (unlike hash()),
+    # so a vehicle always lands in the same partition
+    hashes = pd.util.hash_pandas_object(vehicle_ids.astype(str), index=False).to_numpy()
+    return (hashes % n_partitions).astype(np.int64)
+
+def split_by_vehicle(file_name, out_dir, n_partitions=64, batch_size=1_000_000):
+    """
+    Streams the raw file in record batches and appends every row to the
+    partition file of its vehicle hash, so each vehicle's full history ends up
+    in exactly one partition while only one batch is held in memory. Rows with
+    SESSION_HOUR = -1 are dropped as in agg for arima.sql.
+    """
+    parquet_file = pq.ParquetFile(file_name)
+    writers = {}
+    rows = 0
+    try:
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=RAW_COLUMNS):
+            table = pa.Table.from_batches([batch])
+            parts = vehicle_partition(table.column(VEHICLE_COLUMN).to_pandas(), n_partitions)
+            hours = table.column("SESSION_HOUR").to_pandas()
+            parts[(hours == -1).to_numpy()] = -1
+            order = np.argsort(parts, kind="stable")
+            bounds = np.searchsorted(parts[order], np.arange(n_partitions + 1))
+            for part in range(n_partitions):
+                lo, hi = bounds[part], bounds[part + 1]
+                if lo == hi:
+                    continue
+                chunk = table.take(pa.array(order[lo:hi]))
+                if part not in writers:
+                    path = os.path.join(out_dir, f"part-{part:04d}.parquet")
+                    writers[part] = pq.ParquetWriter(path, table.schema)
+                writers[part].write_table(chunk)
+                rows += hi - lo
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return [os.path.join(out_dir, f"part-{part:04d}.parquet") for part in sorted(writers)], rows
+
+def rolling_robust_zscores(hourly, window="7D", min_periods=24, min_scale=0.1):
+    """
+    Robust z-score of every vehicle hour against the same vehicle's previous
+    `window` of active hours.
+
+    hourly is indexed by (VEHICLE_ID, datetime), sorted, with log-scale value
+    columns. The baseline is the rolling median and the scale the rolling
+    interquartile range / 1.349 (the normal-consistent sigma), both from one
+    group-wise rolling pass per statistic with the current hour excluded
+    (closed="left"). Hours with fewer than `min_periods` earlier hours in the
+    window get NaN. The scale is floored at `min_scale` so vehicles with
+    perfectly regular usage do not produce infinite scores.
+    """
+    frame = hourly.reset_index(level=VEHICLE_COLUMN)
+    rolling = frame.groupby(VEHICLE_COLUMN, sort=False)[list(hourly.columns)].rolling(
+        window, closed="left", min_periods=min_periods)
+    median = rolling.median()
+    iqr = rolling.quantile(0.75) - rolling.quantile(0.25)
+    scale = np.maximum(iqr / 1.349, min_scale)
+    return (hourly - median) / scale
+
+def _score_partition(part_file, out_file, window, min_periods, threshold, min_scale):
+    # Runs in a worker process on one vehicle-hash partition
+    start = time.time()
+    df = pd.read_parquet(part_file)
+    df["datetime"] = pd.to_datetime(df["USAGE_DATE"], errors="coerce") + pd.to_timedelta(df["SESSION_HOUR"], unit="h")
+    df = df.dropna(subset=["datetime"])
+    for col in VALUE_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    # A vehicle has one raw row per hour per APN/network, so sum to vehicle hours first
+    hourly = df.groupby([VEHICLE_COLUMN, "datetime"], sort=True)[VALUE_COLUMNS].sum()
+    ecutype = df.groupby(VEHICLE_COLUMN)["ECUTYPE"].first()
+    del df
+
+    z = rolling_robust_zscores(np.log1p(hourly.clip(lower=0)), window, min_periods, min_scale)
+    flags = z.abs() > threshold
+    flagged = flags.any(axis=1)
+
+    anomalies = hourly[flagged].copy()
+    for col in VALUE_COLUMNS:
+        anomalies[f"z_{col}"] = z.loc[flagged, col]
+        anomalies[f"anomaly_{col}"] = flags.loc[flagged, col]
+    anomalies = anomalies.reset_index()
+    anomalies.insert(1, "ECUTYPE", anomalies[VEHICLE_COLUMN].map(ecutype))
+    if not anomalies.empty:
+        anomalies.to_parquet(out_file, index=False)
+
+    return {
+        "partition": os.path.basename(part_file),
+        "vehicles": hourly.index.get_level_values(VEHICLE_COLUMN).nunique(),
+        "vehicle_hours": len(hourly),
+        "anomalies": int(flagged.sum()),
+        **{f"anomalies_{col}": int(flags[col].sum()) for col in VALUE_COLUMNS},
+        "ecutype_counts": anomalies["ECUTYPE"].value_counts().to_dict(),
+        "runtime": time.time() - start,
+    }
+
+def detect_vehicle_anomalies(file_name, n_partitions=64, max_workers=None, window="7D", min_periods=24,
+                             threshold=3.5, min_scale=0.1, batch_size=1_000_000):
+    """
+    Per-vehicle rolling anomaly detection over raw SAMPLE_DATA rows.
+
+    The raw file is split into `n_partitions` vehicle-hash partitions in one
+    streaming pass, then each partition is scored by a worker process, which
+    writes its flagged vehicle hours straight to the output dataset. Neither
+    the parent nor any worker holds more than one batch or one partition, so
+    raise n_partitions as the fleet grows to keep memory bounded.
+    """
+    print(f"\n=== Vehicle-level detection: {file_name} ({', '.join(VALUE_COLUMNS)}) ===")
+    start = time.time()
+    base_name = os.path.splitext(file_name)[0]
+    output_dir = f"{base_name}_vehicle_anomalies"
+    if os.path.exists(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    run = run_metrics.current_run()
+
+    split_dir = tempfile.mkdtemp(prefix="vehicle_partitions_")
+    try:
+        with run_metrics.stage("split_by_vehicle", partitions=n_partitions) as split_stats:
+            part_files, rows = split_by_vehicle(file_name, split_dir, n_partitions, batch_size)
+            split_stats["rows"] = rows
+        print(f"Split {rows} rows into {len(part_files)} vehicle partitions in {time.time() - start:.2f} sec")
+
+        summaries = []
+        with run_metrics.stage("score_partitions") as score_stats:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(_score_partition, part_file,
+                                           os.path.join(output_dir, os.path.basename(part_file)),
+                                           window, min_periods, threshold, min_scale)
+                           for part_file in part_files]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    summaries.append(future.result())
+                    run.increment("vehicle_partitions")
+                    print(f"Completed partition {done}/{len(part_files)}")
+            score_stats["anomalies"] = sum(s["anomalies"] for s in summaries)
+    finally:
+        shutil.rmtree(split_dir, ignore_errors=True)
+
+    ecutype_counts = pd.Series(dtype=int)
+    for summary in summaries:
+        ecutype_counts = ecutype_counts.add(pd.Series(summary.pop("ecutype_counts"), dtype=int), fill_value=0)
+    summary_df = pd.DataFrame(summaries).sort_values("partition")
+
+    runtime = time.time() - start
+    print(f"Scored {summary_df['vehicles'].sum()} vehicles ({summary_df['vehicle_hours'].sum()} vehicle hours), "
+          f"flagged {summary_df['anomalies'].sum()} vehicle hours in {runtime:.2f} sec.")
+    for col in VALUE_COLUMNS:
+        print(f"  {col}: {summary_df[f'anomalies_{col}'].sum()} anomalous vehicle hours")
+    if not ecutype_counts.empty:
+        print("Anomalous vehicle hours by ECUTYPE:")
+        print(ecutype_counts.astype(int).sort_values(ascending=False).head(20).to_string())
+    print(f"Saved vehicle anomalies to {output_dir}/")
+    return output_dir, summary_df
+
+def main(file_name="SAMPLE_DATA.parquet", n_partitions=64, max_workers=None):
+    run = run_metrics.start_run("vehicle_anomalies")
+    detect_vehicle_anomalies(file_name, n_partitions, max_workers)
+    run_summary = run.finish()
+    print(f"Run metrics written to {run.metrics_file} (peak memory: {run_summary['peak_memory_mb']} MB)")
+
+if __name__ == "__main__":
+    main()
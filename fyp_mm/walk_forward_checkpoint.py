@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+def series_fingerprint(ts, **config):
+    """
+    Hash of a series' timestamps, values and the run configuration. A checkpoint
+    is only resumed when this matches, so edited input data or changed model
+    settings never mix with windows computed earlier.
+    """
+    h = hashlib.sha256()
+    index = ts.index.asi8 if isinstance(ts.index, pd.DatetimeIndex) else np.asarray(ts.index.astype(str))
+    h.update(np.ascontiguousarray(index).tobytes())
+    h.update(np.ascontiguousarray(ts.to_numpy(dtype=float)).tobytes())
+    h.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def _to_json(obj):
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    return str(obj)
+
+class WalkForwardCheckpoint:
+    """
+    Append-only JSON lines file holding completed walk-forward windows.
+
+    The first line is a header with the input fingerprint; every following line
+    is one finished window (its forecast rows, anomalies and fitted parameters).
+    Windows are buffered and written every `every` windows; a partially written
+    last line from a crash is ignored on load. The file is removed once the
+    walk-forward completes.
+    """
+
+    def __init__(self, path, fingerprint, every=5):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.every = every
+        self._pending = []
+
+    def load(self):
+        # Returns the completed windows in order, creating the file if needed
+        if not os.path.exists(self.path):
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"type": "header", "fingerprint": self.fingerprint}) + "\n")
+            return []
+
+        records = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            raise ValueError(f"Checkpoint {self.path} is empty; delete it to start a fresh run")
+        header = json.loads(lines[0])
+        if header.get("fingerprint") != self.fingerprint:
+            raise ValueError(f"Checkpoint {self.path} was written for different input data or settings; "
+                             f"delete it to start a fresh run")
+        for i, line in enumerate(lines[1:], start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Interrupted write: keep the complete windows before it and
+                # cut the broken tail so new windows append cleanly
+                with open(self.path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines[:i]) + "\n")
+                break
+            for row in record["rows"] + record["anomalies"]:
+                row["datetime"] = pd.Timestamp(row["datetime"])
+            records.append(record)
+        return records
+
+    def add(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in self._pending:
+                f.write(json.dumps(record, default=_to_json) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending = []
+
+    def discard(self):
+        # Called once the walk-forward has finished
+        self._pending = []
+        if os.path.exists(self.path):
+            os.remove(self.path)
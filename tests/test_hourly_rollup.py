@@ -0,0 +1,47 @@
+import os
+import pandas as pd
+import pandas.testing as pdt
+from fyp_mm.hourly_rollup import update_rollup
+
+def write_partition(path, rows):
+    df = pd.DataFrame(rows, columns=["USAGE_DATE", "SESSION_HOUR", "TOTAL_MB_CHARGED", "TOTAL_SESSIONS"])
+    df = df.astype({"USAGE_DATE": str, "SESSION_HOUR": "int64", "TOTAL_MB_CHARGED": "float64",
+                    "TOTAL_SESSIONS": "int64"})
+    df.to_parquet(path, index=False)
+
+def assert_same_rollup(incremental, rebuilt):
+    pdt.assert_frame_equal(incremental.reset_index(drop=True), rebuilt.reset_index(drop=True), check_dtype=False)
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_partition(raw_dir / "day1.parquet", [("2024-01-01", 0, 1.5, 2), ("2024-01-01", 1, 2.0, 1),
+                                               ("2024-01-01", -1, 9.0, 9)])
+    write_partition(raw_dir / "day2.parquet", [("2024-01-02", 0, 3.0, 4)])
+    store = tmp_path / "store"
+    update_rollup(str(raw_dir), str(store))
+
+    # Late rows for an hour already in the rollup, an empty new day and a removed day
+    write_partition(raw_dir / "day3.parquet", [("2024-01-03", 5, 1.0, 1), ("2024-01-01", 1, 0.5, 3)])
+    write_partition(raw_dir / "day4.parquet", [])
+    os.remove(raw_dir / "day2.parquet")
+    incremental = update_rollup(str(raw_dir), str(store))
+
+    rebuilt = update_rollup(str(raw_dir), str(tmp_path / "rebuilt"))
+    assert_same_rollup(incremental, rebuilt)
+    late_hour = incremental[(incremental["USAGE_DATE"] == "2024-01-01") & (incremental["SESSION_HOUR"] == 1)]
+    assert late_hour["SUM_MB"].item() == 2.5
+    assert late_hour["SUM_SESSIONS"].item() == 4
+    assert "2024-01-02" not in set(incremental["USAGE_DATE"])
+
+def test_raw_dir_spelling_does_not_change_partitions(tmp_path, monkeypatch):
+    raw_dir = tmp_path / "raw"
+    raw_dir.mkdir()
+    write_partition(raw_dir / "day1.parquet", [("2024-01-01", 0, 1.5, 2)])
+    store = tmp_path / "store"
+    first = update_rollup(str(raw_dir), str(store))
+
+    monkeypatch.chdir(tmp_path)
+    second = update_rollup(os.path.join(".", "raw"), str(store))
+    assert_same_rollup(second, first)
+    assert len(os.listdir(store / "contributions")) == 1
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+from fyp_mm.IFensemble import run_ensemble
+
+def write_hourly_features(path, hours, rng, sample_fraction=1.0):
+    # IF_Ready_Data-like rows; a sample thins the raw rows, so every sum and count shrinks with it
+    counts = {
+        "SUM_SESSIONS": rng.poisson(400, len(hours)),
+        "COUNTRY_Other": rng.poisson(60, len(hours)),
+        "RAT_4G": rng.poisson(250, len(hours)),
+    }
+    df = pd.DataFrame({
+        "USAGE_DATE": hours.strftime("%Y-%m-%d"),
+        "SESSION_HOUR": hours.hour,
+        "SUM_MB": rng.lognormal(7, 0.3, len(hours)) * sample_fraction,
+        **{col: rng.binomial(values, sample_fraction) for col, values in counts.items()},
+    })
+    df.to_parquet(path, index=False)
+
+def test_down_scaled_sample_flags_like_full_data(tmp_path):
+    rng = np.random.default_rng(0)
+    hours = pd.date_range("2024-01-01", periods=24 * 60, freq="h")
+    full_file = str(tmp_path / "IF_Ready_Data.parquet")
+    sample_file = str(tmp_path / "IF_Ready_Data_10.parquet")
+    write_hourly_features(full_file, hours, rng)
+    write_hourly_features(sample_file, hours, rng, sample_fraction=0.1)
+
+    _, runs = run_ensemble(full_file, {"Full": (full_file, 100), "10": (sample_file, 10)}, seeds=[0, 1],
+                           max_workers=1, contamination=0.05)
+    flag_rate = (runs.groupby("sample")["anomalies"].mean() / len(hours))
+    assert abs(flag_rate["10"] - flag_rate["Full"]) < 0.05
@@ -0,0 +1,53 @@
+import os
+import pandas as pd
+import pandas.testing as pdt
+from fyp_mm.partitioned_results import compact, existing_partitions, read_range, write_partitioned
+
+def hourly(start, hours, value):
+    return pd.DataFrame({"datetime": pd.date_range(start, periods=hours, freq="h"), "value": float(value)})
+
+def part_files(root, date):
+    return sorted(os.listdir(os.path.join(root, f"date={date}")))
+
+def test_new_mode_writes_new_days_and_the_latest_only(tmp_path):
+    root = str(tmp_path / "results")
+    assert write_partitioned(hourly("2024-01-01", 36, 1), root) == ["2024-01-01", "2024-01-02"]
+    written = write_partitioned(hourly("2024-01-01", 72, 2), root)
+    assert written == ["2024-01-02", "2024-01-03"]
+    df = read_range(root)
+    assert (df.loc[df["datetime"] < "2024-01-02", "value"] == 1).all()
+    assert (df.loc[df["datetime"] >= "2024-01-02", "value"] == 2).all()
+
+def test_new_mode_rewrites_everything_when_the_fingerprint_changes(tmp_path):
+    root = str(tmp_path / "results")
+    write_partitioned(hourly("2024-01-01", 72, 1), root, fingerprint="a")
+    assert write_partitioned(hourly("2024-01-01", 72, 1), root, fingerprint="a") == ["2024-01-03"]
+    written = write_partitioned(hourly("2024-01-02", 48, 2), root, fingerprint="b")
+    assert written == ["2024-01-02", "2024-01-03"]
+    assert existing_partitions(root) == ["2024-01-02", "2024-01-03"]
+    assert (read_range(root)["value"] == 2).all()
+
+def test_replace_mode_rewrites_every_day(tmp_path):
+    root = str(tmp_path / "results")
+    write_partitioned(hourly("2024-01-01", 48, 1), root)
+    assert write_partitioned(hourly("2024-01-01", 48, 2), root, mode="replace") == ["2024-01-01", "2024-01-02"]
+    assert (read_range(root)["value"] == 2).all()
+    assert len(part_files(root, "2024-01-01")) == 1
+
+def test_append_then_compact_keeps_the_latest_rows(tmp_path):
+    root = str(tmp_path / "results")
+    write_partitioned(hourly("2024-01-01", 24, 1), root, mode="append")
+    write_partitioned(hourly("2024-01-01", 24, 2), root, mode="append")
+    assert len(part_files(root, "2024-01-01")) == 2
+    assert len(read_range(root)) == 48
+
+    assert compact(root) == 1
+    assert len(part_files(root, "2024-01-01")) == 1
+    pdt.assert_frame_equal(read_range(root), hourly("2024-01-01", 24, 2), check_dtype=False)
+
+def test_read_range_is_half_open(tmp_path):
+    root = str(tmp_path / "results")
+    write_partitioned(hourly("2024-01-01", 72, 1), root)
+    df = read_range(root, "2024-01-02", "2024-01-03")
+    assert df["datetime"].min() == pd.Timestamp("2024-01-02")
+    assert df["datetime"].max() == pd.Timestamp("2024-01-02 23:00")
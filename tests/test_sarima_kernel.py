@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fyp_mm.sarima_kernel import compare_with_statsmodels, forecast_aligned, forecast_prefixes, walk_forward_bounds
+
+PARAMS = pd.Series({"const": 5.0, "ar.L1": 0.6, "ar.S.L24": 0.3, "ma.S.L24": 0.2, "ma.S.L48": -0.1, "sigma2": 0.04})
+ATOL = 1e-6
+
+@pytest.fixture
+def ts_log():
+    # Daily cycle plus noise, like the log hourly usage the walk-forward runs on
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-01", periods=24 * 25, freq="h")
+    hours = np.arange(len(index))
+    return pd.Series(5.0 + 0.5 * np.sin(2 * np.pi * hours / 24) + rng.normal(0, 0.2, len(index)), index=index)
+
+@pytest.mark.parametrize("max_train", [None, 240], ids=["expanding", "sliding"])
+def test_kernel_matches_statsmodels(ts_log, max_train):
+    bounds = walk_forward_bounds(len(ts_log), max_train=max_train)
+    check = compare_with_statsmodels(ts_log, PARAMS, bounds[::3], horizon=48)
+    assert check["max_mean_diff"] <= ATOL
+    assert check["max_variance_rel_diff"] <= ATOL
+
+def test_prefix_filter_matches_padded_batch(ts_log):
+    y = ts_log.to_numpy()
+    lengths = walk_forward_bounds(len(y))[:, 1]
+    windows = np.zeros((len(lengths), lengths.max()))
+    for i, length in enumerate(lengths):
+        windows[i, :length] = y[:length]
+    means, variances = forecast_prefixes(y, lengths, 48, PARAMS)
+    batch_means, batch_variances = forecast_aligned(windows, lengths, 48, PARAMS)
+    np.testing.assert_allclose(means, batch_means, rtol=0, atol=1e-10)
+    np.testing.assert_allclose(variances, batch_variances, rtol=1e-10)
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from fyp_mm.scoring_service import SeasonalForecaster
+
+def test_observation_past_horizon_advances_forecasts():
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-01", periods=24 * 10, freq="h")
+    ts_log = pd.Series(5.0 + 0.5 * np.sin(2 * np.pi * np.arange(len(index)) / 24)
+                       + rng.normal(0, 0.1, len(index)), index=index)
+    forecaster = SeasonalForecaster(ts_log, alpha=0.0027, horizon=48)
+
+    # An hour after an outage longer than the horizon
+    late_hour = forecaster.table.index[-1] + pd.Timedelta(hours=5)
+    forecaster.observe([late_hour], [np.expm1(5.0)])
+    forecaster.updates.join()
+    assert forecaster.last_observed == late_hour
+
+    next_hour = late_hour + pd.Timedelta(hours=1)
+    scored = forecaster.score([next_hour], [np.expm1(5.0)])
+    assert not np.isnan(scored["forecast"].iloc[0])
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+from fyp_mm.sarima_kernel import walk_forward_bounds
+from fyp_mm.seasonal_prefilter import candidate_windows
+
+def test_missing_hour_keeps_windows_aligned():
+    # A noise-free daily cycle, so only the spike departs from its hour's baseline
+    index = pd.date_range("2024-01-01", periods=24 * 30, freq="h")
+    ts_log = pd.Series(5.0 + 0.5 * np.sin(2 * np.pi * index.hour / 24), index=index)
+    ts_log = ts_log.drop(pd.Timestamp("2024-01-09 03:00"))
+    bounds = walk_forward_bounds(len(ts_log))
+
+    # Spike the fourth hour of the walk-forward's sixth test window (positions, as detect_anomalies uses)
+    spiked = 5
+    ts_log.iloc[bounds[spiked, 1] + 3] += 1.0
+
+    escalate = candidate_windows(ts_log, threshold=2.5)
+    assert len(escalate) == len(bounds)
+    assert np.flatnonzero(escalate).tolist() == [spiked]
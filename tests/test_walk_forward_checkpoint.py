@@ -0,0 +1,63 @@
+import os
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+from statsmodels.tsa.arima.model import ARIMA
+from fyp_mm.ARIMApredictions import detect_anomalies
+
+@pytest.fixture
+def ts_log():
+    # Four 48-hour windows after the 120-hour initial training set, with a spike in each of the last two
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2024-01-01", periods=120 + 48 * 4, freq="h")
+    hours = np.arange(len(index))
+    values = 5.0 + 0.5 * np.sin(2 * np.pi * hours / 24) + rng.normal(0, 0.1, len(index))
+    values[[230, 290]] += 3.0
+    return pd.Series(values, index=index)
+
+def count_fits(monkeypatch, fail_after=None):
+    fit = ARIMA.fit
+    calls = []
+
+    def counted_fit(self, *args, **kwargs):
+        calls.append(len(self.endog))
+        if fail_after is not None and len(calls) > fail_after:
+            raise RuntimeError("interrupted")
+        return fit(self, *args, **kwargs)
+
+    monkeypatch.setattr(ARIMA, "fit", counted_fit)
+    return calls
+
+def test_resumed_run_matches_uninterrupted_run(ts_log, tmp_path, monkeypatch):
+    expected_anomalies, expected_results, _ = detect_anomalies(ts_log, verbose=False)
+    checkpoint_file = str(tmp_path / "SUM_MB_checkpoint.jsonl")
+
+    with monkeypatch.context() as m:
+        count_fits(m, fail_after=2)
+        detect_anomalies(ts_log, verbose=False, checkpoint_file=checkpoint_file)
+    assert os.path.exists(checkpoint_file)
+
+    with monkeypatch.context() as m:
+        calls = count_fits(m)
+        anomalies, results, _ = detect_anomalies(ts_log, verbose=False, checkpoint_file=checkpoint_file)
+    assert calls == [120 + 48 * 2, 120 + 48 * 3]
+    assert anomalies == expected_anomalies
+    pdt.assert_frame_equal(results, expected_results, check_dtype=False)
+    assert not os.path.exists(checkpoint_file)
+
+def test_checkpoint_for_other_input_or_settings_is_rejected(ts_log, tmp_path, monkeypatch):
+    checkpoint_file = str(tmp_path / "checkpoint.jsonl")
+    with monkeypatch.context() as m:
+        count_fits(m, fail_after=1)
+        detect_anomalies(ts_log, verbose=False, checkpoint_file=checkpoint_file)
+
+    edited = ts_log.copy()
+    edited.iloc[10] += 1.0
+    with pytest.raises(ValueError, match="different input data or settings"):
+        detect_anomalies(edited, verbose=False, checkpoint_file=checkpoint_file)
+    with pytest.raises(ValueError, match="different input data or settings"):
+        detect_anomalies(ts_log, verbose=False, checkpoint_file=checkpoint_file, max_train=200)
+    with pytest.raises(ValueError, match="different input data or settings"):
+        detect_anomalies(ts_log, verbose=False, checkpoint_file=checkpoint_file, alpha=0.0001,
+                         metric="SUM_SESSIONS")